@@ -1,7 +1,25 @@
 use eframe::egui;
-use std::process::Command;
+use std::io::{BufRead, BufReader, Read, Write};
+use std::net::TcpStream;
+use std::process::{Command, Stdio};
+use std::sync::atomic::{AtomicBool, Ordering};
+use std::sync::mpsc::{self, Receiver, Sender, TryRecvError};
+use std::thread;
+use std::time::Duration;
 
 const PYTHON_EXECUTABLE: &str = "python3";
+const DAEMON_ADDRESS: &str = "127.0.0.1:8765";
+
+static DAEMON_STARTED: AtomicBool = AtomicBool::new(false);
+
+/// Message from the analysis thread to the UI.
+enum Update {
+    /// One progress line, appended to the output while the analysis runs.
+    Progress(String),
+    /// Final report text (or error message) replacing the progress lines.
+    Done(String),
+}
+
 fn main() -> Result<(), eframe::Error> {
     eframe::run_native(
         "Alfa Developers Qualification",
@@ -16,6 +34,7 @@ struct MyApp {
     end_date: String,
     link: String,
     result: String,
+    pending: Option<Receiver<Update>>,
 }
 
 impl eframe::App for MyApp {
@@ -48,6 +67,27 @@ impl eframe::App for MyApp {
 
         ctx.set_style(style);
 
+        while let Some(receiver) = &self.pending {
+            match receiver.try_recv() {
+                Ok(Update::Progress(line)) => {
+                    self.result.push('\n');
+                    self.result.push_str(&line);
+                }
+                Ok(Update::Done(result)) => {
+                    self.result = result;
+                    self.pending = None;
+                }
+                Err(TryRecvError::Empty) => {
+                    ctx.request_repaint_after(Duration::from_millis(100));
+                    break;
+                }
+                Err(TryRecvError::Disconnected) => {
+                    self.result = "Analysis failed.".to_string();
+                    self.pending = None;
+                }
+            }
+        }
+
         egui::CentralPanel::default().show(ctx, |ui| {
             ui.add_space(20.0);
             ui.heading("Rate skills of specified developer.");
@@ -86,7 +126,9 @@ impl eframe::App for MyApp {
                         );
                     });
 
-                    if ui.button("Submit").clicked() {
+                    let button =
+                        ui.add_enabled(self.pending.is_none(), egui::Button::new("Submit"));
+                    if button.clicked() {
                         if self.start_date.is_empty() {
                             self.result = "Start date is required.".to_string();
                             return;
@@ -104,7 +146,15 @@ impl eframe::App for MyApp {
                             return;
                         }
 
-                        self.result = execute(&self.start_date, &self.end_date, &self.link)
+                        let (sender, receiver) = mpsc::channel();
+                        let (start_date, end_date, link) = (
+                            self.start_date.clone(),
+                            self.end_date.clone(),
+                            self.link.clone(),
+                        );
+                        thread::spawn(move || execute(&start_date, &end_date, &link, &sender));
+                        self.pending = Some(receiver);
+                        self.result = "Analyzing...".to_string();
                     }
                 });
             });
@@ -136,8 +186,110 @@ impl eframe::App for MyApp {
     }
 }
 
-fn execute(start_date: &str, end_date: &str, link: &str) -> String {
-    let output = Command::new(PYTHON_EXECUTABLE)
+fn execute(start_date: &str, end_date: &str, link: &str, sender: &Sender<Update>) {
+    let result = match execute_with_daemon(start_date, end_date, link, sender) {
+        Ok(result) => result,
+        Err(_) => {
+            // Daemon is not running yet: start it for the next requests
+            // and answer this one with a one-off process.
+            start_daemon();
+            execute_once(start_date, end_date, link, sender)
+        }
+    };
+    let _ = sender.send(Update::Done(result));
+}
+
+/// Turns one JSON Lines progress event (see progress.py) into a UI update.
+fn handle_event(line: &str, sender: &Sender<Update>) -> Option<String> {
+    let event: serde_json::Value = serde_json::from_str(line).ok()?;
+    let text = |name: &str| event[name].as_str().unwrap_or("").to_string();
+    let progress = match event["event"].as_str()? {
+        "done" => return Some(text("text")),
+        "error" => return Some(text("error")),
+        "downloaded" => format!("Downloaded {} ({} bytes)", text("url"), event["bytes"]),
+        "linted" => format!("Linted {}: {} issues", text("url"), event["issues"]),
+        "diff_stats" => format!("Changes: +{} -{}", event["additions"], event["deletions"]),
+        _ => return None,
+    };
+    let _ = sender.send(Update::Progress(progress));
+    None
+}
+
+fn http_request(method: &str, path: &str, body: &str) -> std::io::Result<serde_json::Value> {
+    let mut stream = TcpStream::connect(DAEMON_ADDRESS)?;
+    write!(
+        stream,
+        "{method} {path} HTTP/1.0\r\nHost: {DAEMON_ADDRESS}\r\nContent-Type: application/json\r\nContent-Length: {}\r\n\r\n{body}",
+        body.len()
+    )?;
+    let mut response = String::new();
+    stream.read_to_string(&mut response)?;
+    let payload = response
+        .split_once("\r\n\r\n")
+        .map(|(_, payload)| payload)
+        .unwrap_or("");
+    serde_json::from_str(payload)
+        .map_err(|e| std::io::Error::new(std::io::ErrorKind::InvalidData, e))
+}
+
+fn execute_with_daemon(
+    start_date: &str,
+    end_date: &str,
+    link: &str,
+    sender: &Sender<Update>,
+) -> std::io::Result<String> {
+    let request = serde_json::json!({
+        "urls": [link],
+        "start_date": start_date,
+        "end_date": end_date,
+    });
+    let created = http_request("POST", "/reports", &request.to_string())?;
+    let Some(id) = created["id"].as_str() else {
+        return Ok(created["error"]
+            .as_str()
+            .unwrap_or("Daemon rejected the request.")
+            .to_string());
+    };
+
+    // The events endpoint streams JSON Lines until the report is finished
+    let mut stream = TcpStream::connect(DAEMON_ADDRESS)?;
+    write!(
+        stream,
+        "GET /reports/{id}/events HTTP/1.0\r\nHost: {DAEMON_ADDRESS}\r\n\r\n"
+    )?;
+    let mut lines = BufReader::new(stream).lines();
+    for line in lines.by_ref() {
+        if line?.is_empty() {
+            break;
+        }
+    }
+    for line in lines {
+        if let Some(result) = handle_event(&line?, sender) {
+            return Ok(result);
+        }
+    }
+    Ok("Analysis was interrupted.".to_string())
+}
+
+fn start_daemon() {
+    if DAEMON_STARTED.swap(true, Ordering::SeqCst) {
+        return;
+    }
+    let _ = Command::new(PYTHON_EXECUTABLE)
+        .arg("../daemon.py")
+        .stdout(Stdio::null())
+        .stderr(Stdio::null())
+        .spawn();
+}
+
+fn execute_once(start_date: &str, end_date: &str, link: &str, sender: &Sender<Update>) -> String {
+    // Own report file per request so parallel runs do not overwrite each other
+    let report_path = std::env::temp_dir().join(format!(
+        "code_quality_report_{}_{:?}.rpt",
+        std::process::id(),
+        thread::current().id()
+    ));
+    let mut child = Command::new(PYTHON_EXECUTABLE)
         .arg("../back.py")
         .arg("--urls")
         .arg(link)
@@ -146,17 +298,31 @@ fn execute(start_date: &str, end_date: &str, link: &str) -> String {
         .arg("--end-date")
         .arg(end_date)
         .arg("--output")
-        .arg("code_quality_report.rpt")
-        .output()
+        .arg(&report_path)
+        .arg("--events")
+        .stdout(Stdio::piped())
+        .stderr(Stdio::piped())
+        .spawn()
         .expect("Failed to execute command");
-    if output.status.success() {
-        let content = std::fs::read_to_string("code_quality_report.rpt")
-            .expect("Failed to read output file")
-            .to_string();
-        return content;
-    } else {
-        let content = output.stdout;
-        let content = String::from_utf8_lossy(&content);
-        return content.to_string();
+
+    // Drain stderr in the background so a chatty child cannot block on a full pipe
+    let mut stderr = child.stderr.take().expect("Failed to read command errors");
+    let errors = thread::spawn(move || {
+        let mut errors = String::new();
+        let _ = stderr.read_to_string(&mut errors);
+        errors
+    });
+
+    // Progress events arrive on stdout one line at a time
+    let stdout = child.stdout.take().expect("Failed to read command output");
+    let mut result = None;
+    for line in BufReader::new(stdout).lines().map_while(Result::ok) {
+        if let Some(text) = handle_event(&line, sender) {
+            result = Some(text);
+        }
     }
+    let errors = errors.join().unwrap_or_default();
+    let _ = child.wait();
+    let _ = std::fs::remove_file(&report_path);
+    result.unwrap_or(errors)
 }
@@ -1,9 +1,14 @@
 import argparse
-import requests
-import tempfile
-import subprocess
-import datetime
-from smth import generate_report  # Импортируем функцию из main.py
+import contextlib
+import json
+import os
+import sys
+from report import FORMATS, generate_report, render_report
+from progress import NdjsonWriter, emit
+from instrumentation import Recorder, cprofile, get_default_recorder
+
+# Загрузчик, линтеры и кэши импортируются внутри функций: --help, проверка
+# аргументов и разбор пакета не должны ждать импорта HTTP-стека и sqlite
 
 def parse_github_url(url):
     """
@@ -13,56 +18,158 @@ def parse_github_url(url):
     https://github.com/user/repo/blob/branch/path/to/file.py -> 
     https://raw.githubusercontent.com/user/repo/branch/path/to/file.py
     """
-    parts = url.split('/')
-    if len(parts) < 7 or parts[2] != 'github.com' or parts[5] != 'blob':
+    from gitrepo import github_raw_url
+    
+    raw_url = github_raw_url(url)
+    if raw_url == url:
         raise ValueError(f"Неверная ссылка на файл GitHub: {url}")
-    user = parts[3]
-    repo = parts[4]
-    branch = parts[6]
-    path = '/'.join(parts[7:])
-    raw_url = f"https://raw.githubusercontent.com/{user}/{repo}/{branch}/{path}"
     return raw_url
 
 def download_file(url):
-    """Скачивает содержимое файла по ссылке GitHub."""
+    """Скачивает содержимое файла по ссылке GitHub (через общий кэш на диске)."""
+    from downloader import get_default_downloader
+    
     raw_url = parse_github_url(url)
-    response = requests.get(raw_url)
-    if response.status_code != 200:
-        raise Exception(f"Не удалось скачать файл по ссылке: {url} (статус: {response.status_code})")
-    return response.text
+    result = get_default_downloader().fetch(raw_url)
+    if not result.ok:
+        raise Exception(f"Не удалось скачать файл по ссылке: {url} (статус: {result.status})")
+    return result.text
 
-def analyze_code(urls, start_date, end_date):
+def analyze_code(urls, start_date, end_date, on_event=None, recorder=None):
     """
     Анализирует код из файлов по указанным ссылкам с помощью flake8 и формирует данные для отчёта.
     
+    Ошибки скачивания и линтинга не прерывают анализ, а попадают в отчёт строками.
+    
     :param urls: Список ссылок на файлы GitHub
     :param start_date: Начальная дата периода
     :param end_date: Конечная дата периода
+    :param on_event: Колбэк для событий хода анализа (см. progress.py)
+    :param recorder: Сборщик замеров этапов (см. instrumentation.py)
     :return: Словарь с данными для generate_report
     """
+    data, _ = analyze_code_with_errors(urls, start_date, end_date, on_event, recorder)
+    return data
+
+def analyze_code_with_errors(urls, start_date, end_date, on_event=None, recorder=None):
+    """
+    То же, что analyze_code, но возвращает ещё и {ссылка: ошибка} для файлов,
+    которые не удалось скачать или проверить.
+    
+    :param urls: Список ссылок на файлы GitHub
+    :param start_date: Начальная дата периода
+    :param end_date: Конечная дата периода
+    :param on_event: Колбэк для событий хода анализа (см. progress.py)
+    :param recorder: Сборщик замеров этапов (см. instrumentation.py)
+    :return: (данные для generate_report, ошибки по ссылкам)
+    """
+    from downloader import get_default_downloader
+    from linters import LintJob, LintScheduler
+    from lint_cache import LINTER_CONFIG_FILES, blob_sha_file, get_default_lint_cache, get_fingerprint, strip_issues
+    from workspace import Workspace
+    
+    recorder = recorder or Recorder(parent=get_default_recorder())
     linter_issues = []
+    temp_files = {}
+    errors = {}
     
-    for url in urls:
-        try:
-            # Скачиваем содержимое файла
-            code = download_file(url)
-            
-            # Сохраняем во временный файл для анализа
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.py', delete=False) as temp_file:
-                temp_file.write(code)
-                temp_file_path = temp_file.name
-            
-            # Запускаем flake8 для анализа кода
-            result = subprocess.run(['flake8', temp_file_path], capture_output=True, text=True)
-            issues = result.stdout.splitlines()
-            for issue in issues:
-                linter_issues.append(f"{url}: {issue}")
+    # Результаты flake8 кэшируются по содержимому файла и версии/настройкам линтера
+    lint_cache = get_default_lint_cache()
+    fingerprint = get_fingerprint('python', 'flake8', lint_cache)
+    shas = {}
+    issues_by_url = {}
+    unattributed = []
+    
+    # Файлы лежат в одном рабочем каталоге под путями из репозитория и
+    # удаляются вместе с ним, даже если анализ прервался ошибкой
+    with Workspace() as workspace:
+        workspace.copy_configs(LINTER_CONFIG_FILES)
+        
+        raw_urls = {}
+        for url in urls:
+            try:
+                raw_urls[url] = parse_github_url(url)
+            except ValueError as e:
+                errors[url] = f"Ошибка при анализе {url}: {str(e)}"
+        
+        # Скачиваем все файлы параллельно потоком прямо в рабочий каталог, байты
+        # как есть: кодировку исходника определяет сам flake8
+        downloader = get_default_downloader()
+        with recorder.span('download', count=len(raw_urls)) as span:
+            results = downloader.fetch_all_to_files(
+                {raw_url: workspace.path_for(url) for url, raw_url in raw_urls.items()}
+            )
+            span['bytes'] = sum(result.bytes for result in results.values() if result.ok)
+        
+        for url, raw_url in raw_urls.items():
+            try:
+                result = results[raw_url]
+                path = result.path
+                recorder.record('download_file', result.latency, url=url, bytes=result.bytes,
+                                cached=result.cached, attempts=result.attempts)
+                if result.skipped:
+                    # Двоичные и слишком большие файлы не проверяются и ошибкой не считаются
+                    print(f"Пропущен {url}: {result.error}")
+                    emit(on_event, 'skipped', url=url, reason=result.skipped)
+                    continue
+                if not result.ok:
+                    raise Exception(f"Не удалось скачать файл по ссылке: {url} ({result.error or result.status})")
+                emit(on_event, 'downloaded', url=url, bytes=result.bytes, cached=result.cached)
             
-            # Удаляем временный файл
-            subprocess.run(['rm', temp_file_path])
+                shas[url] = blob_sha_file(path)
+                cached = lint_cache.get(shas[url], fingerprint)
+                if cached is not None:
+                    os.remove(path)
+                    issues_by_url[url] = cached
+                    emit(on_event, 'linted', url=url, issues=len(cached), cached=True)
+                    continue
+                temp_files[url] = path
         
-        except Exception as e:
-            linter_issues.append(f"Ошибка при анализе {url}: {str(e)}")
+            except Exception as e:
+                errors[url] = f"Ошибка при анализе {url}: {str(e)}"
+    
+        # Запускаем flake8 параллельно на всех ядрах
+        scheduler = LintScheduler()
+        jobs = [LintJob('flake8', files) for files in scheduler.split(temp_files, 'flake8')]
+    
+        def on_result(result):
+            if result.error is not None:
+                return
+            counts = {url: 0 for url in result.job.files}
+            for url, _ in result.issues:
+                if url in counts:
+                    counts[url] += 1
+            for url, count in counts.items():
+                emit(on_event, 'linted', url=url, issues=count, cached=False)
+    
+        with recorder.span('lint', count=len(temp_files)):
+            for result in scheduler.run(jobs, on_result if on_event is not None else None):
+                recorder.record('lint_job', result.duration, files=len(result.job.files), count=len(result.issues),
+                                error=type(result.error).__name__ if result.error else None)
+                if result.error is not None:
+                    for url in result.job.files:
+                        errors[url] = f"Ошибка при анализе {url}: {str(result.error)}"
+                    continue
+                fresh = {url: [] for url in result.job.files}
+                for url, issue in result.issues:
+                    if url is not None:
+                        fresh[url].append(issue)
+                    else:
+                        unattributed.append(str(issue))
+                # Запуск с нераспознанными строками не кэшируется, чтобы сбой не запомнился
+                cacheable = all(url is not None for url, _ in result.issues)
+                for url, issues in fresh.items():
+                    issues_by_url[url] = strip_issues(issues)
+                    if cacheable:
+                        lint_cache.put(shas[url], fingerprint, issues_by_url[url])
+    
+    # Порядок проблем совпадает с порядком ссылок
+    for url in urls:
+        for line, col, code, message in issues_by_url.get(url, []):
+            linter_issues.append(f"{url}: {line}:{col}: {code} {message}")
+        if url in errors:
+            linter_issues.append(errors[url])
+    linter_issues.extend(unattributed)
     
     # Формируем данные для отчёта
     data = {
@@ -77,24 +184,203 @@ def analyze_code(urls, start_date, end_date):
         'Deletions': 0
     }
     
-    return data
+    return data, errors
+
+def run_with_events(urls, start_date, end_date, output, report_options, recorder):
+    """
+    Пишет в stdout события хода анализа (JSON Lines, см. progress.py),
+    последним - done с текстом отчёта или error. Остальной вывод
+    перенаправляется в stderr, чтобы не смешиваться с событиями.
+    """
+    writer = NdjsonWriter(sys.stdout)
+    try:
+        with contextlib.redirect_stdout(sys.stderr):
+            data = analyze_code(urls, start_date, end_date, on_event=writer, recorder=recorder)
+            with recorder.span('report_write', output=output):
+                generate_report(data, output, **report_options)
+    except Exception as e:
+        emit(writer, 'error', error=str(e))
+        sys.exit(1)
+    emit(writer, 'done', output=output, text=render_report(data))
+
+def read_batch_requests(input_path):
+    """
+    Построчно читает запросы из JSONL-файла и возвращает пары (запрос, ошибка).
+    
+    Каждая строка: {"id": ..., "urls": [...], "start_date": "YYYY-MM-DD", "end_date": "YYYY-MM-DD"};
+    если id нет, используется request_id или номер строки. Для строки, которая
+    не разбирается как JSON-объект, запрос - {"id": "line-N"}, а ошибка - её
+    описание, чтобы одна битая строка не останавливала весь пакет.
+    """
+    with open(input_path, encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                request = json.loads(line)
+            except ValueError as e:
+                yield {'id': f"line-{line_number}"}, f"Некорректная строка {line_number}: {e}"
+                continue
+            if not isinstance(request, dict):
+                yield {'id': f"line-{line_number}"}, f"Строка {line_number} не является JSON-объектом"
+                continue
+            request.setdefault('id', request.get('request_id', str(line_number)))
+            yield request, None
+
+def read_checkpoint(output_path):
+    """Возвращает id запросов, уже успешно обработанных в предыдущих запусках"""
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except ValueError:
+                continue  # Недописанная строка от прерванного запуска
+            if result.get('status') == 'ok':
+                done.add(result['id'])
+    return done
+
+def ends_with_newline(path):
+    """Заканчивается ли файл переводом строки (пустой или отсутствующий - да)"""
+    if not os.path.exists(path) or not os.path.getsize(path):
+        return True
+    with open(path, 'rb') as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b'\n'
+
+def analyze_request(request, recorder=None):
+    """
+    Результат одного запроса пакета. Если какой-то файл не скачался или не
+    проверился, статус - error (с неполным отчётом), и при повторном запуске
+    запрос обрабатывается заново.
+    """
+    try:
+        data, errors = analyze_code_with_errors(
+            request['urls'], request['start_date'], request['end_date'], recorder=recorder
+        )
+    except Exception as e:
+        return {'id': request['id'], 'status': 'error', 'error': str(e)}
+    if errors:
+        return {'id': request['id'], 'status': 'error', 'error': '; '.join(errors.values()), 'report': data}
+    return {'id': request['id'], 'status': 'ok', 'report': data}
+
+def run_batch(input_path, output_path, workers, recorder=None):
+    """
+    Обрабатывает запросы из JSONL-файла в одном процессе с ограниченным
+    параллелизмом. Кэши скачивания и линтинга общие на весь пакет.
+    Результаты дописываются в output_path по мере готовности, поэтому
+    прерванный пакет при повторном запуске продолжается с необработанных
+    запросов. Уже запущенные запросы дописываются и тогда, когда чтение
+    входа прервалось ошибкой.
+    """
+    from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+    
+    done = read_checkpoint(output_path)
+    # Недописанная последняя строка прерванного запуска не должна склеиться с новой записью
+    separate = not ends_with_newline(output_path)
+    processed = skipped = 0
+    with open(output_path, 'a', encoding='utf-8') as out, ThreadPoolExecutor(max_workers=workers) as pool:
+        if separate:
+            out.write('\n')
+        pending = set()
+        
+        def write_result(result):
+            nonlocal processed
+            # default=list: отчёт может содержать ленивый IssueLines вместо списка строк
+            out.write(json.dumps(result, ensure_ascii=False, default=list) + '\n')
+            out.flush()
+            processed += 1
+        
+        def write_finished(futures):
+            for future in futures:
+                write_result(future.result())
+        
+        try:
+            for request, error in read_batch_requests(input_path):
+                if error is not None:
+                    write_result({'id': request['id'], 'status': 'error', 'error': error})
+                    continue
+                if request['id'] in done:
+                    skipped += 1
+                    continue
+                # Не читаем вход дальше, чем успеваем обрабатывать
+                if len(pending) >= workers * 2:
+                    finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    write_finished(finished)
+                pending.add(pool.submit(analyze_request, request, recorder))
+        finally:
+            finished, _ = wait(pending)
+            write_finished(finished)
+    
+    print(f"Обработано запросов: {processed}, пропущено (уже готовы): {skipped}")
+
+def write_instrumentation(recorder, args):
+    """Сохраняет замеры этапов по флагам --trace, --metrics и --timings (сообщения - в stderr)"""
+    if args.trace:
+        recorder.write_trace(args.trace)
+        print(f"Трасса этапов сохранена в файл: {args.trace}", file=sys.stderr)
+    if args.metrics:
+        recorder.write_prometheus(args.metrics)
+        print(f"Метрики этапов сохранены в файл: {args.metrics}", file=sys.stderr)
+    if args.timings:
+        print(recorder.format_summary(), file=sys.stderr)
 
 def main():
     # Настраиваем парсер аргументов командной строки
     parser = argparse.ArgumentParser(description='Генерация отчёта о качестве кода')
-    parser.add_argument('--urls', nargs='+', required=True, help='Ссылки на файлы GitHub')
-    parser.add_argument('--start-date', required=True, help='Начальная дата периода (YYYY-MM-DD)')
-    parser.add_argument('--end-date', required=True, help='Конечная дата периода (YYYY-MM-DD)')
+    parser.add_argument('--urls', nargs='+', help='Ссылки на файлы GitHub')
+    parser.add_argument('--start-date', help='Начальная дата периода (YYYY-MM-DD)')
+    parser.add_argument('--end-date', help='Конечная дата периода (YYYY-MM-DD)')
     parser.add_argument('--output', default='code_quality_report.rpt', help='Имя выходного файла')
+    parser.add_argument('--format', choices=FORMATS, help='Формат отчёта (по умолчанию по расширению --output)')
+    parser.add_argument('--max-issues-per-file', type=int, help='Сколько проблем линтера выводить на файл')
+    parser.add_argument('--group-by-file', action='store_true', help='Группировать проблемы линтера по файлам')
+    parser.add_argument('--batch', help='JSONL-файл с запросами для пакетной обработки')
+    parser.add_argument('--batch-output', default='results.jsonl', help='JSONL-файл с результатами пакета')
+    parser.add_argument('--workers', type=int, default=4, help='Сколько запросов пакета обрабатывать одновременно')
+    parser.add_argument('--events', action='store_true', help='Писать ход анализа в stdout в формате JSON Lines')
+    parser.add_argument('--trace', help='JSON-файл для трассы этапов (chrome://tracing, Perfetto)')
+    parser.add_argument('--metrics', help='Файл для итогов по этапам в формате Prometheus')
+    parser.add_argument('--timings', action='store_true', help='Вывести в stderr время и объёмы по этапам')
+    parser.add_argument('--profile', help='Профилировать запуск cProfile и сохранить статистику в файл')
     
     # Парсим аргументы
     args = parser.parse_args()
     
+    recorder = Recorder()
+    try:
+        with cprofile(args.profile):
+            run(parser, args, recorder)
+    finally:
+        write_instrumentation(recorder, args)
+
+def run(parser, args, recorder):
+    if args.batch:
+        run_batch(args.batch, args.batch_output, max(1, args.workers), recorder)
+        return
+    
+    missing = [name for name in ('urls', 'start_date', 'end_date') if not getattr(args, name)]
+    if missing:
+        parser.error(f"обязательные аргументы: {', '.join('--' + name.replace('_', '-') for name in missing)}")
+    
+    report_options = {
+        'fmt': args.format,
+        'max_issues_per_file': args.max_issues_per_file,
+        'group_by_file': args.group_by_file,
+    }
+    if args.events:
+        run_with_events(args.urls, args.start_date, args.end_date, args.output, report_options, recorder)
+        return
+    
     # Анализируем код и получаем данные
-    data = analyze_code(args.urls, args.start_date, args.end_date)
+    data = analyze_code(args.urls, args.start_date, args.end_date, recorder=recorder)
     
     # Генерируем отчёт
-    generate_report(data, args.output)
+    with recorder.span('report_write', output=args.output):
+        generate_report(data, args.output, **report_options)
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,177 @@
+"""
+Кэш конфигов линтеров (config_cache.py) против локального мок-сервера LLM.
+
+Конфиг запрашивается так же, как в отчёте (MergeRequestReport._get_linter_config),
+но клиент DeepSeek направлен на мок-сервер, а кэш лежит во временном каталоге.
+Возраст записи подменяется в файле кэша, поэтому проверка не ждёт TTL.
+Проверяется, что:
+  - одновременные промахи по одному ключу дают одну загрузку конфига;
+  - свежая запись отдаётся без запросов;
+  - устаревшая (старше refresh_after) отдаётся сразу, а обновляется в фоне одной загрузкой;
+  - просроченная (старше ttl) запрашивается заново, а при ошибке сервера отдаётся старая.
+
+Запуск: python benchmarks/bench_config_cache.py --clients 32 --latency 0.3
+"""
+import argparse
+import datetime as dt
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config_cache import LinterConfigCache  # noqa: E402
+from deepseek import DeepSeekAPI  # noqa: E402
+from test_all import MergeRequestReport  # noqa: E402
+
+TTL = 3600.0
+REFRESH_AFTER = 600.0
+
+
+def make_handler(latency: float):
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        received = 0
+        failing = False
+        version = 0
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers['Content-Length']))
+            with lock:
+                Handler.received += 1
+                version = Handler.version
+            time.sleep(latency)
+            if Handler.failing:
+                body = b'{"error": "unavailable"}'
+                self.send_response(503)
+            else:
+                config = {
+                    'command': f"flake8 --max-line-length={100 + version}",
+                    'extensions': ['.py'],
+                    'antipatterns': [{'code': 'F401', 'description': 'неиспользуемый импорт'}],
+                }
+                text = "```json\n" + json.dumps(config) + "\n```"
+                body = json.dumps({'choices': [{'text': text}]}).encode('utf-8')
+                self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def age_entry(cache: LinterConfigCache, key, age: float):
+    """Делает запись кэша старше на age секунд"""
+    path = cache._path(key)
+    with open(path, encoding='utf-8') as f:
+        entry = json.load(f)
+    entry['created_at'] = time.time() - age
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(entry, f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Проверка кэша конфигов линтеров на мок-сервере LLM')
+    parser.add_argument('--clients', type=int, default=32, help='Сколько отчётов одновременно запрашивают конфиг')
+    parser.add_argument('--latency', type=float, default=0.3, help='Задержка ответа мок-сервера, с')
+    args = parser.parse_args()
+
+    handler = make_handler(args.latency)
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    cache = LinterConfigCache(root=tempfile.mkdtemp(prefix='hacaton-configs-'), ttl=TTL, refresh_after=REFRESH_AFTER)
+    client = DeepSeekAPI(
+        api_key='test',
+        base_url=f"http://127.0.0.1:{server.server_address[1]}",
+        timeout=(1.0, 5.0),
+        retries=0,
+        rate_limit=0
+    )
+    report = MergeRequestReport(
+        created_at=dt.datetime(2025, 1, 1), merged_at=dt.datetime(2025, 1, 2),
+        github_file_urls=[], positives=[], config_cache=cache, defer=True
+    )
+    report.deepseek = client
+    key = (report.language, report.CONFIG_PROMPT_VERSION, report.CONFIG_MODEL)
+
+    # Клиент DeepSeek сам объединяет одинаковые запросы, поэтому считаем вызовы
+    # fetch, которые делает кэш, а не только запросы, дошедшие до сервера
+    fetch_lock = threading.Lock()
+    fetches = [0]
+    fetch_config = report._fetch_deepseek_config
+
+    def counted_fetch():
+        with fetch_lock:
+            fetches[0] += 1
+        return fetch_config()
+
+    report._fetch_deepseek_config = counted_fetch
+    checks = []
+
+    def check(name: str, ok: bool, details: str):
+        checks.append(ok)
+        print(f"{'OK  ' if ok else 'FAIL'} {name}: {details}")
+
+    def get_many(count: int):
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=count) as pool:
+            configs = list(pool.map(lambda _: report._get_linter_config(), range(count)))
+        return configs, time.perf_counter() - started
+
+    # 1. Холодный кэш: все ждут один общий запрос
+    configs, elapsed = get_many(args.clients)
+    same = all(config == configs[0] for config in configs) and configs[0].get('antipatterns')
+    check('холодный кэш', fetches[0] == 1 and handler.received == 1 and bool(same),
+          f"{args.clients} вызовов, загрузок: {fetches[0]}, запросов к серверу: {handler.received}, {elapsed:.2f} с")
+
+    # 2. Свежая запись: без запросов и без ожидания сервера
+    configs, elapsed = get_many(args.clients)
+    check('свежая запись', fetches[0] == 1 and elapsed < args.latency,
+          f"загрузок: {fetches[0] - 1}, {elapsed * 1000:.1f} мс")
+
+    # 3. Старше refresh_after: ответ сразу, обновление в фоне одним запросом
+    handler.version = 1
+    age_entry(cache, key, REFRESH_AFTER + 1)
+    configs, elapsed = get_many(args.clients)
+    served_stale = all(config['command'].endswith('=100') for config in configs)
+    deadline = time.monotonic() + args.latency * 10
+    while cache.stats()['in_flight'] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    refreshed = report._get_linter_config()['command'].endswith('=101')
+    check('фоновое обновление', served_stale and elapsed < args.latency and fetches[0] == 2 and refreshed,
+          f"ответ за {elapsed * 1000:.1f} мс, загрузок: {fetches[0] - 1}, обновлено: {refreshed}")
+
+    # 4. Старше ttl: синхронный запрос
+    handler.version = 2
+    age_entry(cache, key, TTL + 1)
+    config = report._get_linter_config()
+    check('просроченная запись', fetches[0] == 3 and config['command'].endswith('=102'),
+          f"загрузок: {fetches[0] - 2}, команда: {config['command']}")
+
+    # 5. Старше ttl, сервер недоступен: отдаётся старая запись
+    handler.failing = True
+    age_entry(cache, key, TTL + 1)
+    config = report._get_linter_config()
+    check('ошибка сервера', fetches[0] == 4 and handler.received == 4 and config['command'].endswith('=102'),
+          f"загрузок: {fetches[0] - 3}, команда: {config['command']}")
+
+    print(f"Статистика кэша: {cache.stats()}")
+    server.shutdown()
+    if not all(checks):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
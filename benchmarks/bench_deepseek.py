@@ -0,0 +1,109 @@
+"""
+Клиент DeepSeek против локального мок-сервера OpenRouter.
+
+Сервер отвечает с задержкой, часть ответов - 429/503, часть запросов
+зависает дольше таймаута чтения. Проверяется, что одинаковые запросы
+объединяются, ошибки 429/5xx повторяются, зависший запрос обрывается по
+таймауту, а частота запросов не превышает ограничения.
+
+Запуск: python benchmarks/bench_deepseek.py --clients 32 --prompts 8
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from deepseek import DeepSeekAPI  # noqa: E402
+
+
+def make_handler(latency: float, error_rate: float, stall_prompt: str, seed: int):
+    rng = random.Random(seed)
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        received = 0
+
+        def do_POST(self):
+            data = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+            with lock:
+                Handler.received += 1
+                fail = rng.random() < error_rate
+            if data['prompt'] == stall_prompt:
+                time.sleep(5)
+            time.sleep(latency)
+            if fail:
+                body = b'{"error": "rate limited"}'
+                self.send_response(rng.choice([429, 503]))
+            else:
+                body = json.dumps({'choices': [{'text': data['prompt']}]}).encode('utf-8')
+                self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарк клиента DeepSeek на мок-сервере')
+    parser.add_argument('--clients', type=int, default=32, help='Сколько потоков одновременно делают запросы')
+    parser.add_argument('--prompts', type=int, default=8, help='Сколько разных промптов')
+    parser.add_argument('--latency', type=float, default=0.2)
+    parser.add_argument('--error-rate', type=float, default=0.3)
+    parser.add_argument('--rate-limit', type=float, default=20.0)
+    args = parser.parse_args()
+
+    handler = make_handler(args.latency, args.error_rate, 'stall', seed=1)
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    client = DeepSeekAPI(
+        api_key='test',
+        base_url=f"http://127.0.0.1:{server.server_address[1]}",
+        timeout=(1.0, 1.0),
+        retries=5,
+        backoff=0.05,
+        rate_limit=args.rate_limit,
+        burst=4
+    )
+    prompts = [f"prompt {i % args.prompts}" for i in range(args.clients)]
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.clients) as pool:
+        responses = list(pool.map(lambda prompt: client.generate('model', prompt, 10, 0.0), prompts))
+    elapsed = time.perf_counter() - started
+    correct = all(response['choices'][0]['text'] == prompt for response, prompt in zip(responses, prompts))
+    stats = client.stats()
+    allowed = 4 + args.rate_limit * elapsed
+    print(f"{args.clients} запросов ({args.prompts} разных) за {elapsed:.2f} с")
+    print(f"Отправлено на сервер: {stats['requests']} (с повторами), объединено: {stats['coalesced']}")
+    print(f"Ответы верные: {correct}, частота в пределах ограничения: {stats['requests'] <= allowed}")
+
+    started = time.perf_counter()
+    try:
+        client.retries = 0
+        client.generate('model', 'stall', 10, 0.0)
+        stalled = False
+    except Exception as e:
+        stalled = type(e).__name__
+    print(f"Зависший запрос оборван через {time.perf_counter() - started:.2f} с: {stalled}")
+
+    server.shutdown()
+    if not correct or not stalled or stats['requests'] > allowed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""
+Бенчмарк загрузчика на локальном HTTP-сервере вместо raw.githubusercontent.com.
+
+С --to-disk файлы скачиваются потоком во временный каталог
+(Downloader.fetch_all_to_files); пик памяти по tracemalloc не должен
+зависеть от --size.
+
+Запуск: python benchmarks/bench_download.py --files 200 --latency 0.05
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests  # noqa: E402
+from downloader import Downloader  # noqa: E402
+
+
+def make_handler(latency: float, body: bytes):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            time.sleep(latency)
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарк параллельной загрузки файлов')
+    parser.add_argument('--files', type=int, default=200)
+    parser.add_argument('--latency', type=float, default=0.05, help='Задержка ответа сервера, сек')
+    parser.add_argument('--size', type=int, default=20000, help='Размер файла, байт')
+    parser.add_argument('--workers', type=int, default=16)
+    parser.add_argument('--to-disk', action='store_true', help='Скачивать потоком в файлы, а не в память')
+    args = parser.parse_args()
+
+    body = (b'x = 1\n' * (args.size // 6 + 1))[:args.size]
+    server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(args.latency, body))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    urls = [f"{base}/file_{i}.py" for i in range(args.files)]
+
+    started = time.perf_counter()
+    for url in urls:
+        requests.get(url).raise_for_status()
+    serial = time.perf_counter() - started
+
+    downloader = Downloader(max_workers=args.workers, max_file_size=max(args.size, 1))
+    workdir = tempfile.mkdtemp()
+    tracemalloc.start()
+    started = time.perf_counter()
+    if args.to_disk:
+        results = downloader.fetch_all_to_files({url: os.path.join(workdir, url.rsplit('/', 1)[1]) for url in urls})
+    else:
+        results = downloader.fetch_all(urls)
+    parallel = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    downloader.close()
+    shutil.rmtree(workdir, ignore_errors=True)
+    server.shutdown()
+
+    latencies = sorted(r.latency for r in results.values())
+    failed = sum(1 for r in results.values() if not r.ok)
+    print(f"Последовательно: {serial:.2f} с")
+    print(f"Параллельно ({args.workers} потоков): {parallel:.2f} с, ошибок: {failed}")
+    print(f"Задержка p50: {latencies[len(latencies) // 2] * 1000:.1f} мс, "
+          f"p95: {latencies[int(len(latencies) * 0.95) - 1] * 1000:.1f} мс")
+    print(f"Скачано байт: {sum(r.bytes for r in results.values())}")
+    print(f"Пик памяти (tracemalloc): {peak / 1024 / 1024:.1f} МБ")
+
+
+if __name__ == '__main__':
+    main()
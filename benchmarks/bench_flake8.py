@@ -0,0 +1,72 @@
+"""
+Сравнение flake8 через CLI (временный файл + процесс) и flake8 в процессе.
+
+Запуск: python benchmarks/bench_flake8.py --files 50 --lines 300
+"""
+import argparse
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flake8_engine import get_engine  # noqa: E402
+
+SNIPPETS = [
+    "import os\n",
+    "x=1\n",
+    "def f( a ):\n    return a\n",
+    "value = [i for i in range(10)]\n",
+    "result = {'key': 'value', 'other':1}\n",
+    "very_long_name = 'a' * 100  # " + "comment " * 10 + "\n",
+]
+
+
+def make_source(lines: int, seed: int) -> str:
+    rng = random.Random(seed)
+    return ''.join(rng.choice(SNIPPETS) for _ in range(lines))
+
+
+def strip_path(line: str) -> str:
+    # Путь в CLI и в процессе разный, сравниваем строку:столбец: код сообщение
+    return line.split('.py:', 1)[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарк flake8: CLI против работы в процессе')
+    parser.add_argument('--files', type=int, default=50)
+    parser.add_argument('--lines', type=int, default=300)
+    args = parser.parse_args()
+
+    sources = [make_source(args.lines, seed) for seed in range(args.files)]
+
+    started = time.perf_counter()
+    cli_issues = []
+    for source in sources:
+        with tempfile.NamedTemporaryFile('w', suffix='.py', delete=False, encoding='utf-8') as tmp_file:
+            tmp_file.write(source)
+        result = subprocess.run(['flake8', tmp_file.name], stdout=subprocess.PIPE, text=True)
+        os.remove(tmp_file.name)
+        cli_issues.append([strip_path(line) for line in result.stdout.splitlines()])
+    cli_time = time.perf_counter() - started
+
+    engine = get_engine()
+    started = time.perf_counter()
+    inprocess_issues = []
+    for i, source in enumerate(sources):
+        lines = engine.check_source(source, f"file_{i}.py")
+        inprocess_issues.append([strip_path(line) for line in lines])
+    inprocess_time = time.perf_counter() - started
+
+    print(f"CLI: {cli_time / args.files * 1000:.1f} мс на файл")
+    print(f"В процессе: {inprocess_time / args.files * 1000:.1f} мс на файл")
+    print(f"Результаты совпадают: {cli_issues == inprocess_issues}")
+    if cli_issues != inprocess_issues:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
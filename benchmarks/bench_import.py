@@ -0,0 +1,111 @@
+"""
+Время импорта точек входа (python -X importtime) и запуска back.py --help.
+
+Бюджет в benchmarks/import_budget.json: для каждого модуля - предел
+собственного времени импорта (с зависимостями, медиана нескольких
+запусков) и список модулей, которые он не должен тянуть при импорте
+(например, requests). Превышение бюджета завершает скрипт с кодом 1.
+
+Запуск: python benchmarks/bench_import.py --runs 7
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUDGET_PATH = os.path.join(ROOT, 'benchmarks', 'import_budget.json')
+
+
+def parse_importtime(stderr: str, module: str) -> Tuple[int, List[str]]:
+    """
+    Возвращает (время импорта module в мкс, модули, импортированные ради него).
+
+    Строки -X importtime выводятся после завершения импорта, поэтому
+    зависимости module - это строки между предыдущим модулем верхнего
+    уровня (например, site) и строкой самого module.
+    """
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        depth = len(name) - len(name.lstrip())
+        entries.append((int(cumulative), name.strip(), depth))
+    top_depth = min(depth for _, _, depth in entries)
+    start = 0
+    for i, (cumulative, name, depth) in enumerate(entries):
+        if depth != top_depth:
+            continue
+        if name == module:
+            return cumulative, [entry[1] for entry in entries[start:i]]
+        start = i + 1
+    raise RuntimeError(f"{module} не найден в выводе -X importtime")
+
+
+def measure_import(module: str, runs: int) -> Tuple[float, List[str]]:
+    times = []
+    imported: List[str] = []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+            cwd=ROOT,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            text=True
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"Не удалось импортировать {module}:\n{result.stderr[-2000:]}")
+        cumulative, imported = parse_importtime(result.stderr, module)
+        times.append(cumulative / 1000)
+    return statistics.median(times), imported
+
+
+def measure_command(argv: List[str], runs: int) -> float:
+    times = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, *argv], cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        times.append((time.perf_counter() - started) * 1000)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарк времени импорта с проверкой бюджета')
+    parser.add_argument('--runs', type=int, default=7)
+    parser.add_argument('--budget', default=BUDGET_PATH)
+    args = parser.parse_args()
+
+    with open(args.budget, encoding='utf-8') as f:
+        budget = json.load(f)
+
+    failures = []
+    for module, limits in budget.get('modules', {}).items():
+        elapsed, imported = measure_import(module, args.runs)
+        forbidden = sorted(set(imported) & set(limits.get('forbidden', [])))
+        print(f"import {module}: {elapsed:.1f} мс (бюджет {limits['max_ms']} мс), модулей: {len(imported)}")
+        if elapsed > limits['max_ms']:
+            failures.append(f"import {module}: {elapsed:.1f} мс > {limits['max_ms']} мс")
+        if forbidden:
+            failures.append(f"import {module} тянет {', '.join(forbidden)}")
+
+    for name, limits in budget.get('commands', {}).items():
+        elapsed = measure_command(limits['argv'], args.runs)
+        print(f"{name}: {elapsed:.1f} мс (бюджет {limits['max_ms']} мс)")
+        if elapsed > limits['max_ms']:
+            failures.append(f"{name}: {elapsed:.1f} мс > {limits['max_ms']} мс")
+
+    if failures:
+        print('\nПревышен бюджет:')
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+    print('\nБюджет соблюдён')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Память и скорость подсчётов: список строк и LintIssue против IssueTable.
+
+Запуск: python benchmarks/bench_issues.py --issues 200000 --files 500
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from issue_table import IssueTable  # noqa: E402
+from linters import LintIssue, parse_flake8  # noqa: E402
+
+CODES = [
+    ('E501', 'line too long (120 > 79 characters)'),
+    ('F401', "'os' imported but unused"),
+    ('E225', 'missing whitespace around operator'),
+    ('W291', 'trailing whitespace'),
+    ('C901', "'main' is too complex (12)"),
+]
+
+
+def make_issues(count: int, files: int, seed: int = 1):
+    rng = random.Random(seed)
+    urls = [f"https://github.com/user/repo/blob/master/package/module_{i}.py" for i in range(files)]
+    for i in range(count):
+        code, message = rng.choice(CODES)
+        yield LintIssue(urls[i * files // count], rng.randint(1, 5000), rng.randint(1, 120), code, message)
+
+
+def measure(build):
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - started
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, memory, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарк колоночного хранения проблем линтера')
+    parser.add_argument('--issues', type=int, default=200000)
+    parser.add_argument('--files', type=int, default=500)
+    args = parser.parse_args()
+
+    # Вывод линтера разбирается так же, как в отчёте; прежнее представление -
+    # список LintIssue и строка на каждую проблему для отчёта
+    output = '\n'.join(str(issue) for issue in make_issues(args.issues, args.files))
+
+    def build_lists():
+        issues = parse_flake8(output)
+        return issues, [str(issue) for issue in issues]
+
+    (issues, _), list_memory, _ = measure(build_lists)
+    table, table_memory, _ = measure(lambda: IssueTable(parse_flake8(output)))
+
+    print(f"Списки: {list_memory / args.issues:.0f} байт на проблему")
+    print(f"IssueTable: {table_memory / args.issues:.0f} байт на проблему "
+          f"(колонки {table.nbytes() / args.issues:.0f} байт)")
+
+    started = time.perf_counter()
+    by_code = Counter(issue.code for issue in issues)
+    by_file = Counter(issue.file for issue in issues)
+    list_time = time.perf_counter() - started
+
+    # Первый вызов на большой таблице импортирует numpy, его время не считаем
+    table.count_by_code()
+    started = time.perf_counter()
+    table_by_code = table.count_by_code()
+    table_by_file = table.count_by_file()
+    table_time = time.perf_counter() - started
+
+    print(f"Подсчёт по кодам и файлам: списки {list_time * 1000:.1f} мс, IssueTable {table_time * 1000:.1f} мс")
+    print(f"По уровням: {table.count_by_severity()}")
+    print(f"Результаты совпадают: {dict(by_code) == table_by_code and dict(by_file) == table_by_file}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,388 @@
+"""
+Сквозной бенчмарк построения отчёта без сети.
+
+Вместо GitHub - локальный сервер сырых файлов, вместо OpenRouter - мок
+DeepSeek с задержкой, вместо реального проекта - синтетический git-репозиторий:
+files файлов по lines строк, доля строк с замечаниями flake8 - density,
+в каждом следующем коммите меняется доля строк change. Итерация k
+анализирует изменения коммита k относительно k-1, поэтому содержимое и
+ссылки каждый раз новые и кэши не срабатывают (с --warm все итерации
+повторяют один и тот же отчёт после прогрева).
+
+Цели:
+    mr               MergeRequestReport, файлы скачиваются с локального сервера
+    mr_git           MergeRequestReport(source='git', incremental=True)
+    analyze_code     back.analyze_code по ссылкам GitHub (HACATON_RAW_BASE_URL)
+    generate_report  запись отчёта с files * lines * density проблемами
+
+Каждая цель выполняется в отдельном процессе со своим каталогом кэша,
+чтобы пиковая память (RSS) относилась только к ней. Результаты
+(пропускная способность, p50/p95/p99 задержки, пиковая RSS) сравниваются
+с benchmarks/report_baseline.json; ухудшение больше допуска завершает
+скрипт с кодом 1. Базовые значения записываются с --update-baseline.
+
+Нужны git и flake8 (линтер - часть измеряемой нагрузки).
+
+Запуск: python benchmarks/bench_report.py --iterations 20 --files 20 --lines 200
+"""
+import argparse
+import contextlib
+import datetime as dt
+import io
+import json
+import math
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PATH = os.path.join(ROOT, 'benchmarks', 'report_baseline.json')
+
+TARGETS = ('mr', 'mr_git', 'analyze_code', 'generate_report')
+
+# Параметры нагрузки: базовые значения сравниваются, только если они совпадают
+PARAMS = ('iterations', 'workers', 'files', 'lines', 'density', 'change', 'latency', 'llm_latency', 'warm')
+
+# Больше - хуже, кроме пропускной способности
+LATENCY_METRICS = ('p50_ms', 'p95_ms', 'p99_ms')
+
+OWNER_REPO = 'bench/synthetic'
+
+LINTER_CONFIG = {
+    'command': 'flake8',
+    'extensions': ['.py'],
+    'antipatterns': [
+        {'code': 'F401', 'description': 'Неиспользуемый импорт'},
+        {'code': 'E225', 'description': 'Нет пробелов вокруг оператора'},
+        {'code': 'E501', 'description': 'Слишком длинная строка'},
+    ],
+}
+
+
+def make_line(rng: random.Random, number: int, density: float) -> str:
+    """Строка модуля; с вероятностью density - с замечанием flake8"""
+    if rng.random() >= density:
+        return f"value_{number} = {rng.randint(0, 1000)}"
+    return rng.choice((
+        f"value_{number}={rng.randint(0, 1000)}",                 # E225
+        f"value_{number} = [1,2,{rng.randint(0, 9)}]",            # E231
+        f"value_{number} = {rng.randint(0, 1000)}  ",             # W291
+        f"value_{number} = ( {rng.randint(0, 1000)} )",           # E201, E202
+        f"value_{number} = '{'x' * rng.randint(100, 140)}'",      # E501
+    ))
+
+
+class SyntheticRepo:
+    """
+    Git-репозиторий с цепочкой коммитов: первый создаёт files модулей,
+    каждый следующий меняет в них долю change строк. Содержимое каждого
+    коммита также хранится в памяти для сервера сырых файлов.
+    """
+
+    def __init__(self, path: str, files: int, lines: int, density: float, change: float, seed: int = 1):
+        self.path = path
+        self.density = density
+        self.change = change
+        self.rng = random.Random(seed)
+        self.paths = [f"pkg/module_{i:03d}.py" for i in range(files)]
+        self.contents: Dict[str, bytes] = {}
+        self.commits: List[str] = []
+        self._modules = {
+            path: ['import os', 'import sys', ''] + [make_line(self.rng, n, density) for n in range(lines)]
+            for path in self.paths
+        }
+        self._git('init', '-q')
+        self.commit()
+
+    def _git(self, *args) -> str:
+        return subprocess.run(
+            ['git', '-c', 'user.name=bench', '-c', 'user.email=bench@localhost', *args],
+            cwd=self.path, check=True, capture_output=True, text=True
+        ).stdout.strip()
+
+    def commit(self) -> str:
+        """Меняет строки во всех модулях (кроме первого коммита) и коммитит"""
+        if self.commits:
+            for module in self._modules.values():
+                for n in self.rng.sample(range(3, len(module)), max(1, int((len(module) - 3) * self.change))):
+                    module[n] = make_line(self.rng, n + len(self.commits) * 100000, self.density)
+        for path, module in self._modules.items():
+            os.makedirs(os.path.join(self.path, os.path.dirname(path)), exist_ok=True)
+            with open(os.path.join(self.path, path), 'w', encoding='utf-8') as f:
+                f.write('\n'.join(module) + '\n')
+        self._git('add', '-A')
+        self._git('commit', '-q', '-m', f"commit {len(self.commits)}")
+        sha = self._git('rev-parse', 'HEAD')
+        for path, module in self._modules.items():
+            self.contents[f"/{OWNER_REPO}/{sha}/{path}"] = ('\n'.join(module) + '\n').encode('utf-8')
+        self.commits.append(sha)
+        return sha
+
+
+def make_raw_handler(contents: Dict[str, bytes], latency: float):
+    """Сервер сырых файлов: /<owner>/<repo>/<sha>/<path>"""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            time.sleep(latency)
+            body = contents.get(self.path)
+            self.send_response(200 if body is not None else 404)
+            body = body if body is not None else b'not found'
+            self.send_header('Content-Type', 'text/plain; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def make_llm_handler(latency: float):
+    """Мок OpenRouter completions: конфиг линтера в том виде, который ждёт _parse_deepseek_response"""
+    text = '```json\n' + json.dumps(LINTER_CONFIG) + '\n```'
+    body = json.dumps({'choices': [{'text': text}]}).encode('utf-8')
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            time.sleep(latency)
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def start_server(handler) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Перцентиль по ближайшему рангу"""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+def peak_rss_mb() -> Optional[float]:
+    try:
+        import resource
+    except ImportError:
+        return None  # Windows
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux - килобайты, macOS - байты
+    return round(rss / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def make_runs(target: str, args, repo: SyntheticRepo, raw_base: str, workdir: str) -> List[Callable[[], None]]:
+    """Замыкания по одному на итерацию; всё, что не относится к измерению, готовится здесь"""
+    # Модули проекта импортируются после настройки окружения (каталог кэша, адрес LLM)
+    import back
+    from report import generate_report
+    from test_all import MergeRequestReport
+
+    pairs = list(zip(repo.commits, repo.commits[1:]))
+    if args.warm:
+        pairs = [pairs[0]] * (args.iterations + 1)
+    runs = []
+    for base, head in pairs:
+        if target in ('mr', 'mr_git'):
+            git = target == 'mr_git'
+            urls = [
+                (f"https://github.com/{OWNER_REPO}/blob/{head}/{path}" if git
+                 else f"{raw_base}/{OWNER_REPO}/{head}/{path}")
+                for path in repo.paths
+            ]
+            kwargs = dict(
+                created_at=dt.datetime.now(), merged_at=dt.datetime.now(), github_file_urls=urls, positives=[],
+                repo_path=repo.path, base_commit=base, head_commit=head,
+                source='git' if git else 'http', incremental=git,
+            )
+            runs.append(lambda kwargs=kwargs: MergeRequestReport(**kwargs).to_dict())
+        elif target == 'analyze_code':
+            urls = [f"https://github.com/{OWNER_REPO}/blob/{head}/{path}" for path in repo.paths]
+            runs.append(lambda urls=urls: back.analyze_code(urls, '2024-01-01', '2024-02-01'))
+        elif target == 'generate_report':
+            issues = [
+                f"https://github.com/{OWNER_REPO}/blob/{head}/{path}:{line}:1: E225 missing whitespace around operator"
+                for path in repo.paths
+                for line in range(1, int(args.lines * args.density) + 1)
+            ]
+            data = {
+                'Period': '2024-01-01 - 2024-02-01', 'Language': 'python', 'Size': 'Medium', 'Score': 7,
+                'Linter Issues': issues, 'Antipatterns': [], 'Positives': [], 'Additions': 0, 'Deletions': 0,
+            }
+            output = os.path.join(workdir, f"report_{head[:8]}.rpt")
+            runs.append(lambda data=data, output=output: generate_report(data, output))
+        else:
+            raise ValueError(f"Неизвестная цель: {target}")
+    return runs
+
+
+def run_child(target: str, args) -> Dict:
+    """Выполняет одну цель в текущем процессе и возвращает измерения"""
+    workdir = tempfile.mkdtemp(prefix='hacaton-bench-')
+    os.environ['HACATON_CACHE_DIR'] = os.path.join(workdir, 'cache')
+    llm = start_server(make_llm_handler(args.llm_latency))
+    os.environ['HACATON_LLM_BASE_URL'] = f"http://127.0.0.1:{llm.server_address[1]}"
+    os.environ['HACATON_LLM_API_KEY'] = 'bench'
+    try:
+        repo_path = os.path.join(workdir, 'repo')
+        os.makedirs(repo_path)
+        repo = SyntheticRepo(repo_path, args.files, args.lines, args.density, args.change)
+        for _ in range(1 if args.warm else args.iterations):
+            repo.commit()
+        raw = start_server(make_raw_handler(repo.contents, args.latency))
+        raw_base = f"http://127.0.0.1:{raw.server_address[1]}"
+        os.environ['HACATON_RAW_BASE_URL'] = raw_base
+        sys.path.insert(0, ROOT)
+
+        runs = make_runs(target, args, repo, raw_base, workdir)
+        latencies: List[float] = []
+
+        def timed(run):
+            started = time.perf_counter()
+            run()
+            latencies.append(time.perf_counter() - started)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            if args.warm:
+                runs.pop(0)()  # Прогрев: кэши, конфиг линтера, импорт flake8
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=args.workers) as pool:
+                list(pool.map(timed, runs))
+            elapsed = time.perf_counter() - started
+        raw.shutdown()
+        return {
+            'iterations': len(latencies),
+            'seconds': round(elapsed, 3),
+            'throughput': round(len(latencies) / elapsed, 2),
+            'p50_ms': round(percentile(latencies, 50) * 1000, 1),
+            'p95_ms': round(percentile(latencies, 95) * 1000, 1),
+            'p99_ms': round(percentile(latencies, 99) * 1000, 1),
+            'peak_rss_mb': peak_rss_mb(),
+        }
+    finally:
+        llm.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def run_target(target: str, args) -> Dict:
+    argv = [sys.executable, os.path.abspath(__file__), '--child', target]
+    for name in PARAMS:
+        value = getattr(args, name)
+        if isinstance(value, bool):
+            argv += [f"--{name.replace('_', '-')}"] if value else []
+        else:
+            argv += [f"--{name.replace('_', '-')}", str(value)]
+    result = subprocess.run(argv, cwd=ROOT, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Цель {target} завершилась с ошибкой:\n{result.stderr[-2000:]}")
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def compare(target: str, result: Dict, baseline: Dict, tolerance: float, rss_tolerance: float) -> List[str]:
+    failures = []
+    for metric in LATENCY_METRICS:
+        limit = baseline[metric] * (1 + tolerance)
+        if result[metric] > limit:
+            failures.append(f"{target}: {metric} {result[metric]} > {limit:.1f} (база {baseline[metric]})")
+    limit = baseline['throughput'] / (1 + tolerance)
+    if result['throughput'] < limit:
+        failures.append(f"{target}: throughput {result['throughput']} < {limit:.2f} (база {baseline['throughput']})")
+    if result.get('peak_rss_mb') and baseline.get('peak_rss_mb'):
+        limit = baseline['peak_rss_mb'] * (1 + rss_tolerance)
+        if result['peak_rss_mb'] > limit:
+            failures.append(
+                f"{target}: peak_rss_mb {result['peak_rss_mb']} > {limit:.1f} (база {baseline['peak_rss_mb']})"
+            )
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Сквозной бенчмарк отчёта на локальных заглушках GitHub и OpenRouter')
+    parser.add_argument('--targets', nargs='+', choices=TARGETS, default=list(TARGETS))
+    parser.add_argument('--iterations', type=int, default=20, help='Сколько отчётов строить на цель')
+    parser.add_argument('--workers', type=int, default=1, help='Сколько отчётов строить одновременно')
+    parser.add_argument('--files', type=int, default=20, help='Файлов в синтетическом репозитории')
+    parser.add_argument('--lines', type=int, default=200, help='Строк в файле')
+    parser.add_argument('--density', type=float, default=0.1, help='Доля строк с замечаниями линтера')
+    parser.add_argument('--change', type=float, default=0.2, help='Доля строк, меняющихся в каждом коммите')
+    parser.add_argument('--latency', type=float, default=0.01, help='Задержка сервера сырых файлов, сек')
+    parser.add_argument('--llm-latency', type=float, default=0.2, help='Задержка мок-сервера LLM, сек')
+    parser.add_argument('--warm', action='store_true', help='Повторять один отчёт после прогрева (тёплые кэши)')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--update-baseline', action='store_true', help='Записать результаты как базовые')
+    parser.add_argument('--tolerance', type=float, default=0.5,
+                        help='Допустимое ухудшение задержек и пропускной способности')
+    parser.add_argument('--rss-tolerance', type=float, default=0.25, help='Допустимый рост пиковой памяти')
+    parser.add_argument('--child', choices=TARGETS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    args.workers = max(1, args.workers)
+
+    if args.child:
+        print(json.dumps(run_child(args.child, args)))
+        return
+
+    params = {name: getattr(args, name) for name in PARAMS}
+    results = {}
+    for target in args.targets:
+        results[target] = run_target(target, args)
+        r = results[target]
+        print(
+            f"{target}: {r['iterations']} отчётов за {r['seconds']} с, {r['throughput']}/с, "
+            f"p50 {r['p50_ms']} мс, p95 {r['p95_ms']} мс, p99 {r['p99_ms']} мс, RSS {r['peak_rss_mb']} МБ"
+        )
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    if args.update_baseline:
+        targets = baseline.get('targets', {}) if baseline.get('params') == params else {}
+        baseline = {'params': params, 'targets': {**targets, **results}}
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, ensure_ascii=False, indent=2)
+            f.write('\n')
+        print(f"\nБазовые значения сохранены в {args.baseline}")
+        return
+
+    if baseline.get('params') != params:
+        print('\nПараметры нагрузки отличаются от базовых (или базы нет), сравнение пропущено')
+        return
+
+    failures = []
+    for target, result in results.items():
+        if target in baseline['targets']:
+            failures += compare(target, result, baseline['targets'][target], args.tolerance, args.rss_tolerance)
+    if failures:
+        print('\nРегрессия относительно базовых значений:')
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+    print('\nРегрессий нет')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Пакетная оценка отчётов: score в цикле против score_many (NumPy) и
+повторной оценки свёрнутых IssueStats с другими весами.
+
+Запуск: python benchmarks/bench_scoring.py --reports 50000 --codes 200
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import scoring  # noqa: E402
+from scoring import IssueStats, ScoringModel, to_grade  # noqa: E402
+
+PREFIXES = ['E', 'W', 'F', 'C', 'N', 'E9']
+
+
+def make_stats(reports: int, codes: int, seed: int = 1):
+    rng = random.Random(seed)
+    vocabulary = [f"{rng.choice(PREFIXES)}{100 + i}" for i in range(codes)]
+    stats = []
+    for _ in range(reports):
+        report_codes = {code: rng.randint(1, 20) for code in rng.sample(vocabulary, rng.randint(0, 12))}
+        stats.append((report_codes, rng.randint(0, 2000), rng.randint(0, 3)))
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарк пакетной оценки качества')
+    parser.add_argument('--reports', type=int, default=50000)
+    parser.add_argument('--codes', type=int, default=200)
+    args = parser.parse_args()
+
+    stats = make_stats(args.reports, args.codes)
+    codes = [s[0] for s in stats]
+    changed = [s[1] for s in stats]
+    antipatterns = [s[2] for s in stats]
+    model = ScoringModel()
+
+    started = time.perf_counter()
+    loop = [model.score(c, n, a) for c, n, a in stats]
+    loop_time = time.perf_counter() - started
+    print(f"score в цикле:     {loop_time:.3f} с ({args.reports / loop_time:,.0f} отчётов/с)")
+
+    if not scoring.is_available():
+        print("numpy не установлен, score_many считает тем же циклом")
+        return
+    started = time.perf_counter()
+    batch = model.score_many(codes, changed, antipatterns)
+    batch_time = time.perf_counter() - started
+    print(f"score_many:        {batch_time:.3f} с ({args.reports / batch_time:,.0f} отчётов/с), "
+          f"x{loop_time / batch_time:.1f}")
+
+    # Смена весов: счётчики свёрнуты один раз, каждая модель - только операции над массивами
+    started = time.perf_counter()
+    stats = IssueStats(codes, changed, antipatterns)
+    print(f"IssueStats:        {time.perf_counter() - started:.3f} с (один раз)")
+    models = [ScoringModel(antipattern_weight=w, scale=s) for w in (1.0, 2.0, 4.0) for s in (5.0, 10.0, 20.0)]
+    started = time.perf_counter()
+    for other in models:
+        other.score_stats(stats)
+    rescore_time = (time.perf_counter() - started) / len(models)
+    print(f"score_stats:       {rescore_time:.4f} с на набор весов, x{loop_time / rescore_time:.0f}")
+
+    started = time.perf_counter()
+    model.size_categories(changed)
+    print(f"size_categories:   {time.perf_counter() - started:.3f} с")
+
+    mismatched = sum(to_grade(a) != to_grade(b) for a, b in zip(loop, batch))
+    print(f"Расхождений целых оценок: {mismatched}, макс. разница: {max(abs(a - b) for a, b in zip(loop, batch)):.2e}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, Optional, Tuple
+
+from file_cache import DEFAULT_CACHE_DIR
+
+ConfigKey = Tuple[str, ...]
+
+
+class LinterConfigCache:
+    """
+    Кэш конфигураций линтеров, сгенерированных DeepSeek, на диске.
+
+    Запись живёт ttl секунд. После refresh_after секунд она по-прежнему
+    отдаётся сразу, но в фоне запускается обновление; по истечении ttl
+    конфиг запрашивается заново, а при ошибке отдаётся устаревший. Если
+    обновление по ключу уже идёт, остальные вызовы ждут его результата,
+    а не делают свой запрос.
+    """
+
+    def __init__(
+            self,
+            root: str = os.path.join(DEFAULT_CACHE_DIR, 'configs'),
+            ttl: float = 7 * 24 * 3600,
+            refresh_after: Optional[float] = None
+    ):
+        self.root = root
+        self.ttl = ttl
+        self.refresh_after = refresh_after if refresh_after is not None else ttl * 0.75
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._in_flight: Dict[ConfigKey, Future] = {}
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, key: ConfigKey) -> str:
+        name = hashlib.sha1('\0'.join(key).encode('utf-8')).hexdigest()
+        return os.path.join(self.root, f"{name}.json")
+
+    def _read(self, key: ConfigKey) -> Optional[dict]:
+        try:
+            with open(self._path(key), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, key: ConfigKey, config: Dict):
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'key': list(key), 'created_at': time.time(), 'config': config}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def _refresh(self, key: ConfigKey, fetch: Callable[[], Dict]) -> Future:
+        """Запускает fetch для ключа, если он ещё не запущен, и возвращает общий Future"""
+        with self._lock:
+            future = self._in_flight.get(key)
+            if future is not None:
+                return future
+            future = Future()
+            self._in_flight[key] = future
+
+        def run():
+            try:
+                config = fetch()
+                self._write(key, config)
+                future.set_result(config)
+            except Exception as e:
+                future.set_exception(e)
+            finally:
+                with self._lock:
+                    self._in_flight.pop(key, None)
+
+        threading.Thread(target=run, daemon=True).start()
+        return future
+
+    def get(self, key: ConfigKey, fetch: Callable[[], Dict]) -> Dict:
+        """Возвращает конфиг по ключу (язык, версия промпта, модель), при необходимости вызывая fetch"""
+        entry = self._read(key)
+        age = time.time() - entry['created_at'] if entry else None
+
+        if entry is not None and age < self.ttl:
+            with self._lock:
+                self.hits += 1
+            if age >= self.refresh_after:
+                self._refresh(key, fetch)
+            return entry['config']
+
+        with self._lock:
+            self.misses += 1
+        try:
+            return self._refresh(key, fetch).result()
+        except Exception:
+            if entry is not None:
+                return entry['config']
+            raise
+
+    def stats(self) -> Dict[str, int]:
+        return {'hits': self.hits, 'misses': self.misses, 'in_flight': len(self._in_flight)}
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def get_default_config_cache() -> LinterConfigCache:
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = LinterConfigCache()
+        return _default_cache
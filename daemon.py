@@ -0,0 +1,225 @@
+"""
+Долгоживущий сервис анализа для GUI (app/src/main.rs).
+
+Интерпретатор, импорты, пул HTTP-соединений и кэши остаются прогретыми
+между запросами, а каждый отчёт хранится в памяти под своим id, поэтому
+одновременные пользователи не перезаписывают общий файл отчёта.
+
+API (только 127.0.0.1):
+    POST /reports                {"urls": [...], "start_date": ..., "end_date": ...} -> 202 {"id": ...}
+    GET  /reports/<id>           {"id", "status": queued|running|done|error, "report", "text", "error"}
+    GET  /reports/<id>/events    поток событий задачи (см. progress.py) в формате JSON Lines до её завершения
+    GET  /reports/<id>/trace     замеры этапов задачи (JSON trace, см. instrumentation.py)
+    GET  /metrics                итоги по этапам всех задач в формате Prometheus
+    GET  /health                 {"status": "ok"}
+
+Запуск: python daemon.py [--port 8765] [--workers 4]
+"""
+import argparse
+import json
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+from back import analyze_code
+from instrumentation import Recorder, get_default_recorder
+from report import render_report
+
+DEFAULT_PORT = int(os.environ.get('HACATON_DAEMON_PORT', '8765'))
+
+# Сколько завершённых задач держать в памяти
+MAX_JOBS = 1000
+
+
+class Job:
+    def __init__(self, request: Dict):
+        self.id = uuid.uuid4().hex
+        self.request = request
+        self.status = 'queued'
+        self.report: Optional[Dict] = None
+        self.text: Optional[str] = None
+        self.error: Optional[str] = None
+        self.events: List[Dict] = []
+        self.recorder = Recorder(parent=get_default_recorder())
+        self._changed = threading.Condition()
+        self.emit({'event': 'queued'})
+
+    def emit(self, event: Dict, status: Optional[str] = None):
+        """Добавляет событие; статус меняется под той же блокировкой, чтобы поток событий не потерял последнее"""
+        with self._changed:
+            if status is not None:
+                self.status = status
+            self.events.append({'id': self.id, **event})
+            self._changed.notify_all()
+
+    def wait_events(self, start: int, timeout: float = 15.0) -> List[Dict]:
+        """Ждёт события с номера start (или завершения задачи) и возвращает их"""
+        with self._changed:
+            self._changed.wait_for(lambda: len(self.events) > start or self.finished, timeout)
+            return self.events[start:]
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ('done', 'error')
+
+    def to_dict(self) -> Dict:
+        return {
+            'id': self.id,
+            'status': self.status,
+            'report': self.report,
+            'text': self.text,
+            'error': self.error,
+        }
+
+
+class AnalysisService:
+    def __init__(self, workers: int = 4):
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='analysis')
+        self._jobs: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, request: Dict) -> Job:
+        """Ставит запрос в очередь; ValueError, если запрос не объект с нужными полями"""
+        if not isinstance(request, dict):
+            raise ValueError("Запрос должен быть JSON-объектом")
+        missing = [name for name in ('urls', 'start_date', 'end_date') if not request.get(name)]
+        if missing:
+            raise ValueError(f"Не заданы поля: {', '.join(missing)}")
+        if isinstance(request['urls'], str):
+            request['urls'] = [request['urls']]
+        if not isinstance(request['urls'], list) or not all(isinstance(url, str) for url in request['urls']):
+            raise ValueError("Поле urls должно быть строкой или списком строк")
+        for name in ('start_date', 'end_date'):
+            if not isinstance(request[name], str):
+                raise ValueError(f"Поле {name} должно быть строкой (YYYY-MM-DD)")
+        job = Job(request)
+        with self._lock:
+            self._jobs[job.id] = job
+            while len(self._jobs) > MAX_JOBS:
+                self._jobs.popitem(last=False)
+        self._pool.submit(self._run, job)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run(self, job: Job):
+        job.emit({'event': 'running'}, status='running')
+        try:
+            request = job.request
+            job.report = analyze_code(
+                request['urls'], request['start_date'], request['end_date'],
+                on_event=job.emit, recorder=job.recorder
+            )
+            with job.recorder.span('report_write'):
+                job.text = render_report(job.report)
+            job.emit({'event': 'done', 'text': job.text}, status='done')
+        except Exception as e:
+            job.error = str(e)
+            job.emit({'event': 'error', 'error': job.error}, status='error')
+
+
+def _json_default(value):
+    """Ленивые последовательности (IssueLines из to_dict()) пишутся списком, остальное - строкой"""
+    if isinstance(value, Sequence):
+        return list(value)
+    return str(value)
+
+
+class Handler(BaseHTTPRequestHandler):
+    service: AnalysisService = None
+
+    def _send_json(self, status: int, payload: Dict):
+        text = json.dumps(payload, ensure_ascii=False, default=_json_default)
+        self._send(status, text, 'application/json; charset=utf-8')
+
+    def _send(self, status: int, text: str, content_type: str):
+        body = text.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        if self.path != '/reports':
+            self._send_json(404, {'error': 'not found'})
+            return
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            request = json.loads(self.rfile.read(length) or b'{}')
+            job = self.service.submit(request)
+        except ValueError as e:
+            self._send_json(400, {'error': str(e)})
+            return
+        self._send_json(202, {'id': job.id, 'status': job.status})
+
+    def do_GET(self):
+        parts = [part for part in self.path.split('/') if part]
+        if parts == ['health']:
+            self._send_json(200, {'status': 'ok'})
+            return
+        if parts == ['metrics']:
+            self._send(200, get_default_recorder().to_prometheus(), 'text/plain; version=0.0.4; charset=utf-8')
+            return
+        if len(parts) < 2 or parts[0] != 'reports':
+            self._send_json(404, {'error': 'not found'})
+            return
+        job = self.service.get(parts[1])
+        if job is None:
+            self._send_json(404, {'error': 'unknown report id'})
+            return
+        if len(parts) == 3 and parts[2] == 'events':
+            self._stream_events(job)
+        elif len(parts) == 3 and parts[2] == 'trace':
+            self._send_json(200, job.recorder.to_trace())
+        else:
+            self._send_json(200, job.to_dict())
+
+    def _stream_events(self, job: Job):
+        # HTTP/1.0 без Content-Length: клиент читает строки до закрытия соединения
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson; charset=utf-8')
+        self.end_headers()
+        sent = 0
+        try:
+            while True:
+                events = job.wait_events(sent)
+                for event in events:
+                    self.wfile.write((json.dumps(event, ensure_ascii=False) + '\n').encode('utf-8'))
+                self.wfile.flush()
+                sent += len(events)
+                if events and events[-1]['event'] in ('done', 'error'):
+                    break
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Сервис анализа качества кода на localhost')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--workers', type=int, default=4, help='Сколько отчётов строить одновременно')
+    args = parser.parse_args()
+
+    Handler.service = AnalysisService(workers=max(1, args.workers))
+    server = ThreadingHTTPServer(('127.0.0.1', args.port), Handler)
+    print(f"Сервис анализа запущен на http://127.0.0.1:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,191 @@
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
+if TYPE_CHECKING:
+    import requests
+
+DEFAULT_BASE_URL = "https://openrouter.ai/api/v1/chat"
+
+# Статусы, при которых запрос повторяется
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class RateLimiter:
+    """Token bucket: не больше rate запросов в секунду с запасом burst"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class MissingApiKeyError(RuntimeError):
+    """Ключ LLM API не передан и не задан в HACATON_LLM_API_KEY"""
+
+
+class DeepSeekAPI:
+    """
+    Клиент OpenRouter/DeepSeek (completions).
+
+    Один keep-alive пул соединений на клиент, таймауты (connect, read) на
+    каждый запрос, повторы со случайной экспоненциальной задержкой при
+    429/5xx и сетевых ошибках (Retry-After учитывается), ограничение
+    частоты запросов на стороне клиента. Одинаковые запросы, пришедшие,
+    пока такой же уже выполняется, ждут его ответа вместо отправки своего.
+
+    Ключ берётся из аргумента api_key или переменной окружения
+    HACATON_LLM_API_KEY, в коде его нет. Без ключа клиент создаётся, но
+    запрос бросает MissingApiKeyError, поэтому конфиги из кэша и базовые
+    настройки линтеров работают и без него. Адрес можно переопределить
+    переменной HACATON_LLM_BASE_URL (например, для мок-сервера).
+    """
+
+    def __init__(
+            self,
+            api_key: Optional[str] = None,
+            base_url: Optional[str] = None,
+            timeout: Tuple[float, float] = (5.0, 60.0),
+            retries: int = 3,
+            backoff: float = 1.0,
+            max_backoff: float = 30.0,
+            rate_limit: float = 2.0,
+            burst: int = 4,
+            pool_size: int = 8,
+            session: Optional['requests.Session'] = None
+    ):
+        self.api_key = api_key or os.environ.get('HACATON_LLM_API_KEY')
+        self.base_url = (base_url or os.environ.get('HACATON_LLM_BASE_URL', DEFAULT_BASE_URL)).rstrip('/')
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.pool_size = pool_size
+        self.rate_limiter = RateLimiter(rate_limit, burst) if rate_limit else None
+        self.requests_sent = 0
+        self.coalesced = 0
+        self._session = session
+        self._lock = threading.Lock()
+        self._in_flight: Dict[str, Future] = {}
+
+    @property
+    def session(self) -> 'requests.Session':
+        with self._lock:
+            if self._session is None:
+                # requests нужен только при промахе кэша конфигов, не тянем его при импорте
+                import requests
+                from requests.adapters import HTTPAdapter
+
+                self._session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+                self._session.mount('https://', adapter)
+                self._session.mount('http://', adapter)
+            return self._session
+
+    def generate(self, model: str, prompt: str, max_tokens: int, temperature: float) -> dict:
+        if not self.api_key:
+            raise MissingApiKeyError("Не задан ключ LLM API: укажите его в переменной окружения HACATON_LLM_API_KEY")
+        data = {
+            "model": model,
+            "prompt": prompt,
+            "max_tokens": max_tokens,
+            "temperature": temperature
+        }
+        key = json.dumps(data, sort_keys=True)
+        with self._lock:
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._in_flight[key] = future
+            else:
+                self.coalesced += 1
+        if not leader:
+            return future.result()
+
+        try:
+            future.set_result(self._post(data))
+        except Exception as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+        return future.result()
+
+    async def agenerate(self, model: str, prompt: str, max_tokens: int, temperature: float) -> dict:
+        """Асинхронная версия generate: запрос выполняется в пуле потоков asyncio"""
+        import asyncio
+
+        return await asyncio.to_thread(self.generate, model, prompt, max_tokens, temperature)
+
+    def _retry_delay(self, attempt: int, response=None) -> float:
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), self.max_backoff)
+        delay = min(self.backoff * (2 ** attempt), self.max_backoff)
+        return random.uniform(delay / 2, delay)
+
+    def _post(self, data: Dict) -> dict:
+        import requests
+
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
+        for attempt in range(self.retries + 1):
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            with self._lock:
+                self.requests_sent += 1
+            try:
+                response = self.session.post(
+                    f"{self.base_url}/completions", json=data, headers=headers, timeout=self.timeout
+                )
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == self.retries:
+                    raise
+                time.sleep(self._retry_delay(attempt))
+                continue
+            if response.status_code in RETRY_STATUSES and attempt < self.retries:
+                time.sleep(self._retry_delay(attempt, response))
+                continue
+            response.raise_for_status()
+            return response.json()
+
+    def stats(self) -> Dict[str, int]:
+        return {'requests': self.requests_sent, 'coalesced': self.coalesced, 'in_flight': len(self._in_flight)}
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
+
+
+_default_client = None
+_default_lock = threading.Lock()
+
+
+def get_default_deepseek() -> DeepSeekAPI:
+    """Общий клиент на процесс: пул соединений и ограничение частоты действуют на все отчёты"""
+    global _default_client
+    with _default_lock:
+        if _default_client is None:
+            _default_client = DeepSeekAPI()
+        return _default_client
@@ -0,0 +1,312 @@
+"""
+Профиль разработчика по всем его коммитам за период в локальном репозитории.
+
+Каждый коммит разработчика (без merge-коммитов) - это отдельный отчёт
+MergeRequestReport по изменениям относительно родителя: файлы читаются из
+git, линтятся только изменённые строки. Отчёты строятся параллельно
+конвейером (pipeline.ReportPipeline) и сохраняются в SQLite, поэтому при
+повторном запуске считаются только новые коммиты, а профиль собирается
+из сохранённых результатов.
+
+Вместе с оценкой сохраняются счётчики кодов и антипаттернов, поэтому после
+смены весов (--weights, см. scoring.py) оценки всей истории пересчитываются
+одним проходом без линтинга: --rescore.
+
+Запуск: python developer_profile.py --repo . --author "Имя" --since 2024-01-01 --until 2024-12-31
+"""
+import argparse
+import datetime as dt
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from file_cache import DEFAULT_CACHE_DIR
+from gitrepo import get_commit_index, run_git
+from scoring import ScoringModel, get_default_model, to_grade
+
+# Адрес GitHub из remote.origin.url: git@github.com:user/repo.git или https://github.com/user/repo
+_GITHUB_REMOTE_RE = re.compile(r'github\.com[:/](?P<repo>[^/]+/[^/]+?)(?:\.git)?/?$')
+
+
+class Commit(NamedTuple):
+    sha: str
+    parent: str
+    committed_at: int
+    author: str
+
+
+class ProfileStore:
+    """Результаты отчётов по коммитам в SQLite, ключ - (репозиторий, коммит, язык)"""
+
+    def __init__(self, path: str = os.path.join(DEFAULT_CACHE_DIR, 'profiles.sqlite')):
+        self.path = path
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS commit_reports (
+                repo TEXT NOT NULL,
+                sha TEXT NOT NULL,
+                language TEXT NOT NULL,
+                author TEXT NOT NULL,
+                committed_at INTEGER NOT NULL,
+                additions INTEGER NOT NULL,
+                deletions INTEGER NOT NULL,
+                issues INTEGER NOT NULL,
+                score INTEGER NOT NULL,
+                codes TEXT NOT NULL,
+                antipatterns TEXT NOT NULL,
+                analyzed_at REAL NOT NULL,
+                PRIMARY KEY (repo, sha, language)
+            );
+        """)
+        self._db.commit()
+
+    def known(self, repo: str, language: str, shas: Iterable[str]) -> set:
+        shas = list(shas)
+        known = set()
+        with self._lock:
+            # Не больше 900 параметров в запросе (ограничение sqlite)
+            for start in range(0, len(shas), 900):
+                chunk = shas[start:start + 900]
+                rows = self._db.execute(
+                    f"SELECT sha FROM commit_reports WHERE repo = ? AND language = ? "
+                    f"AND sha IN ({','.join('?' * len(chunk))})",
+                    (repo, language, *chunk)
+                ).fetchall()
+                known.update(row[0] for row in rows)
+        return known
+
+    def put(self, repo: str, language: str, commit: Commit, report) -> None:
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO commit_reports VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    repo, commit.sha, language, commit.author, commit.committed_at,
+                    report.additions, report.deletions, len(report.issue_table), report.quality_score(),
+                    json.dumps(report.issue_table.count_by_code(), ensure_ascii=False),
+                    json.dumps(report.antipatterns, ensure_ascii=False),
+                    time.time(),
+                )
+            )
+            self._db.commit()
+
+    def rescore(self, model: ScoringModel, repo: str, language: str) -> int:
+        """Пересчитывает оценки всех сохранённых отчётов репозитория моделью model, возвращает число изменённых"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT rowid, additions, deletions, codes, antipatterns, score FROM commit_reports "
+                "WHERE repo = ? AND language = ?",
+                (repo, language)
+            ).fetchall()
+        scores = model.score_many(
+            [json.loads(row[3]) for row in rows],
+            [row[1] + row[2] for row in rows],
+            [len(json.loads(row[4])) for row in rows]
+        )
+        updates = [
+            (grade, row[0]) for row, grade in zip(rows, map(to_grade, scores)) if grade != row[5]
+        ]
+        with self._lock:
+            self._db.executemany("UPDATE commit_reports SET score = ? WHERE rowid = ?", updates)
+            self._db.commit()
+        return len(updates)
+
+    def rows(self, repo: str, language: str, shas: Iterable[str]) -> List[sqlite3.Row]:
+        shas = list(shas)
+        rows = []
+        with self._lock:
+            self._db.row_factory = sqlite3.Row
+            try:
+                for start in range(0, len(shas), 900):
+                    chunk = shas[start:start + 900]
+                    rows.extend(self._db.execute(
+                        f"SELECT * FROM commit_reports WHERE repo = ? AND language = ? "
+                        f"AND sha IN ({','.join('?' * len(chunk))}) ORDER BY committed_at",
+                        (repo, language, *chunk)
+                    ).fetchall())
+            finally:
+                self._db.row_factory = None
+        return sorted(rows, key=lambda row: row['committed_at'])
+
+
+class DeveloperProfiler:
+    def __init__(
+            self,
+            repo_path: str,
+            language: str = 'python',
+            store: Optional[ProfileStore] = None,
+            pipeline=None,
+            scoring_model: Optional[ScoringModel] = None
+    ):
+        from pipeline import ReportPipeline
+
+        self.repo_path = os.path.abspath(repo_path)
+        self.language = language.lower()
+        self.store = store or ProfileStore()
+        self.pipeline = pipeline or ReportPipeline()
+        self.scoring_model = scoring_model or get_default_model()
+        self.url_base = self._url_base()
+
+    def _url_base(self) -> str:
+        """Ссылки на файлы в отчётах ведут на GitHub, если origin там, иначе - условный адрес"""
+        try:
+            remote = run_git(self.repo_path, 'config', '--get', 'remote.origin.url').strip()
+        except RuntimeError:
+            remote = ''
+        match = _GITHUB_REMOTE_RE.search(remote)
+        repo = match['repo'] if match else f"local/{os.path.basename(self.repo_path)}"
+        return f"https://github.com/{repo}"
+
+    def commits(self, author: str, since: dt.datetime, until: dt.datetime) -> List[Commit]:
+        """Коммиты автора (по шаблону git log --author) за период, кроме merge-коммитов и корневых"""
+        output = run_git(
+            self.repo_path, 'log', '--no-merges', f"--author={author}",
+            f"--since={since.isoformat()}", f"--until={until.isoformat()}",
+            '--format=%H%x09%P%x09%ct%x09%an <%ae>'
+        )
+        commits = []
+        for line in output.splitlines():
+            sha, parents, timestamp, name = line.split('\t', 3)
+            if parents:
+                commits.append(Commit(sha, parents.split()[0], int(timestamp), name))
+        return commits
+
+    def _report_kwargs(self, commit: Commit) -> Dict:
+        index = get_commit_index(self.repo_path)
+        paths = [path for _, _, path in index.numstat(commit.parent, commit.sha)]
+        committed_at = dt.datetime.fromtimestamp(commit.committed_at)
+        return {
+            'created_at': committed_at,
+            'merged_at': committed_at,
+            'github_file_urls': [f"{self.url_base}/blob/{commit.sha}/{path}" for path in paths],
+            'positives': [],
+            'language': self.language,
+            'source': 'git',
+            'repo_path': self.repo_path,
+            'incremental': True,
+            'base_commit': commit.parent,
+            'head_commit': commit.sha,
+            'scoring_model': self.scoring_model,
+        }
+
+    def update(self, commits: List[Commit], refresh: bool = False) -> Dict[str, int]:
+        """Строит и сохраняет отчёты по коммитам, которых ещё нет в хранилище"""
+        known = set() if refresh else self.store.known(self.repo_path, self.language, (c.sha for c in commits))
+        pending = [commit for commit in commits if commit.sha not in known]
+        failed = 0
+        report_kwargs = (self._report_kwargs(commit) for commit in pending)
+        for result in self.pipeline.imap(report_kwargs):
+            if result.ok:
+                self.store.put(self.repo_path, self.language, pending[result.index], result.report)
+            else:
+                failed += 1
+                print(f"Не удалось построить отчёт для {pending[result.index].sha}: {result.error}", file=sys.stderr)
+        return {'commits': len(commits), 'cached': len(commits) - len(pending), 'analyzed': len(pending) - failed,
+                'failed': failed}
+
+    def profiles(self, authors: List[str], since: dt.datetime, until: dt.datetime, refresh: bool = False) -> List[Dict]:
+        """
+        Профили нескольких авторов: новые коммиты всех авторов досчитываются
+        одним конвейером, затем каждый профиль собирается из хранилища.
+        """
+        commits_by_author = {author: self.commits(author, since, until) for author in authors}
+        unique = {commit.sha: commit for commits in commits_by_author.values() for commit in commits}
+        stats = self.update(list(unique.values()), refresh)
+        return [
+            {**self._aggregate(author, since, until, commits), 'Update': stats}
+            for author, commits in commits_by_author.items()
+        ]
+
+    def profile(self, author: str, since: dt.datetime, until: dt.datetime, refresh: bool = False) -> Dict:
+        """Досчитывает новые коммиты автора и собирает профиль из сохранённых отчётов"""
+        return self.profiles([author], since, until, refresh)[0]
+
+    def rescore(self) -> int:
+        """Пересчитывает сохранённые оценки текущей моделью без повторного анализа"""
+        return self.store.rescore(self.scoring_model, self.repo_path, self.language)
+
+    def _aggregate(self, author: str, since: dt.datetime, until: dt.datetime, commits: List[Commit]) -> Dict:
+        rows = self.store.rows(self.repo_path, self.language, (commit.sha for commit in commits))
+
+        additions = sum(row['additions'] for row in rows)
+        deletions = sum(row['deletions'] for row in rows)
+        issues = sum(row['issues'] for row in rows)
+        changed = additions + deletions
+        codes: Dict[str, int] = {}
+        antipatterns: Dict[str, int] = {}
+        months: Dict[str, List[int]] = {}
+        for row in rows:
+            for code, count in json.loads(row['codes']).items():
+                codes[code] = codes.get(code, 0) + count
+            for antipattern in json.loads(row['antipatterns']):
+                antipatterns[antipattern] = antipatterns.get(antipattern, 0) + 1
+            month = dt.datetime.fromtimestamp(row['committed_at']).strftime('%Y-%m')
+            months.setdefault(month, []).append(row['score'])
+        # Оценка коммита взвешивается объёмом изменений: крупные коммиты важнее опечаток
+        weights = [max(1, row['additions'] + row['deletions']) for row in rows]
+        score = sum(row['score'] * w for row, w in zip(rows, weights)) / sum(weights) if rows else 0
+
+        return {
+            'Author': author,
+            'Period': f"{since.date()} — {until.date()}",
+            'Language': self.language,
+            'Commits': len(rows),
+            'Score': round(score, 1),
+            'Additions': additions,
+            'Deletions': deletions,
+            'Linter Issues': issues,
+            'Issues per 100 lines': round(issues * 100 / changed, 2) if changed else 0.0,
+            'Top Codes': dict(sorted(codes.items(), key=lambda item: -item[1])[:10]),
+            'Antipatterns': dict(sorted(antipatterns.items(), key=lambda item: -item[1])),
+            'Monthly Score': {month: round(sum(s) / len(s), 1) for month, s in sorted(months.items())},
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Профиль разработчика по коммитам за период')
+    parser.add_argument('--repo', default='.', help='Путь к локальному репозиторию')
+    parser.add_argument('--author', nargs='+', required=True, help='Авторы (шаблон git log --author)')
+    parser.add_argument('--since', required=True, help='Начало периода (YYYY-MM-DD)')
+    parser.add_argument('--until', required=True, help='Конец периода включительно (YYYY-MM-DD)')
+    parser.add_argument('--language', default='python')
+    parser.add_argument('--refresh', action='store_true', help='Пересчитать уже сохранённые отчёты')
+    parser.add_argument('--weights', help='JSON с весами проблем для оценки (см. scoring.py)')
+    parser.add_argument('--rescore', action='store_true',
+                        help='Пересчитать оценки сохранённых отчётов по весам без линтинга')
+    parser.add_argument('--output', help='JSON-файл для профилей (по умолчанию stdout)')
+    args = parser.parse_args()
+
+    since = dt.datetime.fromisoformat(args.since)
+    until = dt.datetime.fromisoformat(args.until)
+    if len(args.until) == 10:
+        # Только дата: период включает весь последний день
+        until += dt.timedelta(days=1)
+    try:
+        model = ScoringModel.from_json(args.weights) if args.weights else None
+    except ValueError as e:
+        parser.error(f"{args.weights}: {e}")
+    profiler = DeveloperProfiler(args.repo, args.language, scoring_model=model)
+    if args.rescore:
+        started = time.perf_counter()
+        changed = profiler.rescore()
+        print(f"Оценки пересчитаны: изменено {changed} за {time.perf_counter() - started:.2f} с", file=sys.stderr)
+    profiles = profiler.profiles(args.author, since, until, args.refresh)
+
+    text = json.dumps(profiles, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+        print(f"Профили сохранены в файл: {args.output}")
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
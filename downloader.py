@@ -0,0 +1,284 @@
+import codecs
+import io
+import os
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, BinaryIO, Dict, Iterable, Optional, Tuple
+
+from file_cache import FileCache
+
+if TYPE_CHECKING:
+    import requests
+
+# Статусы, при которых имеет смысл повторить запрос
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Ответ читается кусками такого размера, в памяти на загрузку не больше одного куска
+CHUNK_SIZE = 64 * 1024
+
+# Файлы больше предела не скачиваются до конца (сгенерированный код, дампы)
+DEFAULT_MAX_FILE_SIZE = int(os.environ.get('HACATON_MAX_FILE_SIZE', 5 * 1024 * 1024))
+
+# Как git: файл двоичный, если в первых 8000 байт есть NUL
+BINARY_SNIFF_BYTES = 8000
+
+_CHARSET_RE = re.compile(r'charset=["\']?([-\w.:]+)', re.I)
+# Объявление кодировки в первых двух строках (PEP 263, Ruby magic comment)
+_CODING_RE = re.compile(rb'^[ \t\f]*#.*?coding[:=][ \t]*([-\w.]+)', re.M)
+
+
+def is_binary(head: bytes) -> bool:
+    return b'\0' in head[:BINARY_SNIFF_BYTES]
+
+
+def decode_source(content: bytes, declared: Optional[str] = None) -> Tuple[str, str]:
+    """
+    Декодирует исходник: BOM, объявление coding в первых двух строках,
+    кодировка из заголовка ответа, UTF-8, cp1251 - первая подошедшая
+    без ошибок. Возвращает (текст, кодировка).
+    """
+    if content.startswith(codecs.BOM_UTF8):
+        return content[len(codecs.BOM_UTF8):].decode('utf-8', errors='replace'), 'utf-8-sig'
+    candidates = []
+    match = _CODING_RE.search(b'\n'.join(content.split(b'\n', 2)[:2]))
+    if match:
+        candidates.append(match.group(1).decode('ascii'))
+    candidates += [declared, 'utf-8', 'cp1251']
+    for encoding in candidates:
+        if not encoding:
+            continue
+        try:
+            return content.decode(encoding), encoding
+        except (UnicodeDecodeError, LookupError):
+            continue
+    return content.decode('utf-8', errors='replace'), 'utf-8'
+
+
+class SkippedFile(Exception):
+    """Файл не скачивается: двоичный или больше предела"""
+
+    def __init__(self, reason: str, message: str):
+        super().__init__(message)
+        self.reason = reason
+
+
+@dataclass
+class DownloadResult:
+    """Результат скачивания одного файла"""
+    url: str
+    text: Optional[str] = None
+    status: int = 0
+    bytes: int = 0
+    latency: float = 0.0
+    attempts: int = 0
+    error: Optional[str] = None
+    cached: bool = False
+    path: Optional[str] = None
+    encoding: Optional[str] = None
+    skipped: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and (self.text is not None or self.path is not None)
+
+
+class Downloader:
+    """
+    Параллельно скачивает файлы через общий keep-alive пул соединений.
+
+    Число одновременных запросов ограничено max_workers, каждый запрос
+    выполняется с таймаутом (connect, read) и повторяется с экспоненциальной
+    задержкой при сетевых ошибках и статусах 429/5xx. Если передан cache,
+    файлы по ссылкам на коммит берутся с диска, а ссылки на ветки
+    перепроверяются по ETag.
+
+    Ответ читается потоком кусками по CHUNK_SIZE: fetch_to_file пишет байты
+    как есть прямо в файл, поэтому память на загрузку не зависит от размера
+    файла. Файлы больше max_file_size и двоичные (NUL в начале) обрываются
+    на первых кусках и пропускаются (result.skipped).
+
+    requests импортируется и сессия создаётся при первом сетевом запросе,
+    поэтому попадания в кэш по ссылкам на коммит обходятся без HTTP-стека.
+    """
+
+    def __init__(
+            self,
+            max_workers: int = 8,
+            timeout: Tuple[float, float] = (5.0, 30.0),
+            retries: int = 3,
+            backoff: float = 0.5,
+            session: Optional['requests.Session'] = None,
+            cache: Optional[FileCache] = None,
+            max_file_size: int = DEFAULT_MAX_FILE_SIZE
+    ):
+        self.max_workers = max(1, max_workers)
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self._session = session
+        self._session_lock = threading.Lock()
+        self.cache = cache
+        self.max_file_size = max_file_size
+
+    @property
+    def session(self) -> 'requests.Session':
+        with self._session_lock:
+            if self._session is None:
+                self._session = self._make_session()
+            return self._session
+
+    def _make_session(self) -> 'requests.Session':
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.max_workers, pool_maxsize=self.max_workers)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    def _sleep_before_retry(self, attempt: int):
+        delay = self.backoff * (2 ** attempt)
+        time.sleep(delay + random.uniform(0, delay / 2))
+
+    def fetch(self, url: str) -> DownloadResult:
+        """Скачивает один файл в память (не больше max_file_size) и декодирует его"""
+        buffer = io.BytesIO()
+        result = self._fetch(url, buffer)
+        if result.error is None:
+            result.text, result.encoding = decode_source(buffer.getvalue(), result.encoding)
+        return result
+
+    def fetch_to_file(self, url: str, path: str) -> DownloadResult:
+        """Скачивает файл в path байтами как есть; при ошибке или пропуске path удаляется"""
+        with open(path, 'w+b') as f:
+            result = self._fetch(url, f)
+        if result.error is None:
+            result.path = path
+        else:
+            os.remove(path)
+        return result
+
+    def _fetch(self, url: str, out: BinaryIO) -> DownloadResult:
+        """Пишет содержимое в out с повторами, используя кэш, если он задан"""
+        result = DownloadResult(url=url)
+        started = time.perf_counter()
+        entry = self.cache.get(url, load=False) if self.cache else None
+        if entry is not None and entry.pinned and self._fill_from_cache(result, entry, out):
+            self.cache.record('hits')
+            result.latency = time.perf_counter() - started
+            return result
+
+        import requests
+
+        headers = {'If-None-Match': entry.etag} if entry is not None and entry.etag else {}
+        for attempt in range(self.retries + 1):
+            result.attempts = attempt + 1
+            out.seek(0)
+            out.truncate()
+            result.bytes = 0
+            try:
+                with self.session.get(url, timeout=self.timeout, headers=headers, stream=True) as response:
+                    result.status = response.status_code
+                    if response.status_code == 304 and entry is not None:
+                        if self._fill_from_cache(result, entry, out):
+                            self.cache.record('revalidated')
+                            break
+                        # Объект вытеснен (или больше предела): скачиваем заново без If-None-Match
+                        entry, headers = None, {}
+                        result.error = "объект кэша недоступен"
+                        continue
+                    if response.status_code in RETRY_STATUSES and attempt < self.retries:
+                        self._sleep_before_retry(attempt)
+                        continue
+                    response.raise_for_status()
+                    charset = _CHARSET_RE.search(response.headers.get('Content-Type', ''))
+                    result.encoding = charset.group(1) if charset else None
+                    self._stream(response, out, result)
+                result.error = None
+                if self.cache:
+                    self.cache.record('misses')
+                    out.seek(0)
+                    self.cache.put_stream(url, out, result.encoding, response.headers.get('ETag'))
+                break
+            except SkippedFile as e:
+                result.skipped = e.reason
+                result.error = str(e)
+                break
+            except (requests.ConnectionError, requests.Timeout) as e:
+                result.error = str(e)
+                if attempt < self.retries:
+                    self._sleep_before_retry(attempt)
+            except Exception as e:
+                result.error = str(e)
+                break
+        result.latency = time.perf_counter() - started
+        return result
+
+    def _stream(self, response: 'requests.Response', out: BinaryIO, result: DownloadResult):
+        length = response.headers.get('Content-Length', '')
+        if length.isdigit() and int(length) > self.max_file_size:
+            raise SkippedFile('too_large', f"файл больше {self.max_file_size} байт ({length})")
+        for chunk in response.iter_content(CHUNK_SIZE):
+            if result.bytes < BINARY_SNIFF_BYTES and is_binary(chunk[:BINARY_SNIFF_BYTES - result.bytes]):
+                raise SkippedFile('binary', "двоичный файл")
+            result.bytes += len(chunk)
+            if result.bytes > self.max_file_size:
+                raise SkippedFile('too_large', f"файл больше {self.max_file_size} байт")
+            out.write(chunk)
+
+    def _fill_from_cache(self, result: DownloadResult, entry, out: BinaryIO) -> bool:
+        """Копирует объект кэша в out; False, если его уже вытеснили"""
+        if entry.size > self.max_file_size:
+            return False
+        out.seek(0)
+        out.truncate()
+        try:
+            self.cache.copy_to(entry, out)
+        except OSError:
+            return False
+        result.bytes = entry.size
+        result.encoding = entry.encoding
+        result.cached = True
+        result.error = None
+        return True
+
+    def fetch_all(self, urls: Iterable[str]) -> Dict[str, DownloadResult]:
+        """Скачивает все файлы параллельно, порядок ключей совпадает с порядком urls"""
+        urls = list(dict.fromkeys(urls))
+        if not urls:
+            return {}
+        workers = min(self.max_workers, len(urls))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(self.fetch, urls))
+        return {result.url: result for result in results}
+
+    def fetch_all_to_files(self, paths: Dict[str, str]) -> Dict[str, DownloadResult]:
+        """Параллельно скачивает {url: путь} на диск, порядок ключей сохраняется"""
+        if not paths:
+            return {}
+        workers = min(self.max_workers, len(paths))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(self.fetch_to_file, paths.keys(), paths.values()))
+        return {result.url: result for result in results}
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
+
+
+_default_downloader = None
+_default_lock = threading.Lock()
+
+
+def get_default_downloader() -> Downloader:
+    """Общий загрузчик на процесс, чтобы пул соединений переиспользовался между отчётами"""
+    global _default_downloader
+    with _default_lock:
+        if _default_downloader is None:
+            _default_downloader = Downloader(cache=FileCache())
+        return _default_downloader
@@ -0,0 +1,188 @@
+import hashlib
+import io
+import os
+import re
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from typing import BinaryIO, Dict, Optional
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    'HACATON_CACHE_DIR',
+    os.path.join(os.path.expanduser('~'), '.cache', 'hacaton')
+)
+
+_SHA_RE = re.compile(r'^[0-9a-f]{40}$')
+
+# Размер куска при копировании объектов кэша
+CHUNK_SIZE = 64 * 1024
+
+
+def is_pinned_url(url: str) -> bool:
+    """
+    Проверяет, указывает ли сырая ссылка GitHub на конкретный коммит.
+
+    https://raw.githubusercontent.com/user/repo/<sha>/path -> True,
+    ссылки на ветки (master, refs/heads/...) -> False.
+    """
+    parts = url.split('/')
+    if len(parts) < 7 or parts[2] != 'raw.githubusercontent.com':
+        return False
+    return bool(_SHA_RE.match(parts[5].lower()))
+
+
+@dataclass
+class CacheEntry:
+    content: Optional[bytes]
+    encoding: Optional[str]
+    etag: Optional[str]
+    pinned: bool
+    path: Optional[str] = None
+    size: int = 0
+
+
+class FileCache:
+    """
+    Контентно-адресуемый кэш скачанных файлов на диске.
+
+    Содержимое хранится один раз под своим sha256 в objects/, а индекс
+    url -> sha256 (+ ETag) лежит в SQLite. Файлы по ссылкам на коммит
+    неизменяемы и отдаются без сети, ссылки на ветки перепроверяются через
+    If-None-Match. При превышении max_bytes вытесняются давно не
+    использованные объекты.
+    """
+
+    def __init__(self, root: str = os.path.join(DEFAULT_CACHE_DIR, 'files'), max_bytes: int = 512 * 1024 * 1024):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(root, 'objects'), exist_ok=True)
+        self._db = sqlite3.connect(os.path.join(root, 'index.sqlite'), check_same_thread=False)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS entries (
+                url TEXT PRIMARY KEY,
+                sha TEXT NOT NULL,
+                encoding TEXT,
+                etag TEXT
+            );
+            CREATE TABLE IF NOT EXISTS objects (
+                sha TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                last_used REAL NOT NULL
+            );
+        """)
+        self._db.commit()
+
+    def _object_path(self, sha: str) -> str:
+        return os.path.join(self.root, 'objects', sha[:2], sha)
+
+    def record(self, counter: str):
+        """Увеличивает счётчик hits/misses/revalidated"""
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def get(self, url: str, load: bool = True) -> Optional[CacheEntry]:
+        """
+        Возвращает запись из кэша или None (счётчики ведёт вызывающий через record).
+        С load=False содержимое не читается: его можно скопировать из entry.path (copy_to).
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT sha, encoding, etag FROM entries WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            sha, encoding, etag = row
+            path = self._object_path(sha)
+            try:
+                if load:
+                    with open(path, 'rb') as f:
+                        content = f.read()
+                    size = len(content)
+                else:
+                    content, size = None, os.path.getsize(path)
+            except OSError:
+                self._db.execute("DELETE FROM entries WHERE url = ?", (url,))
+                self._db.commit()
+                return None
+            self._db.execute("UPDATE objects SET last_used = ? WHERE sha = ?", (time.time(), sha))
+            self._db.commit()
+        return CacheEntry(
+            content=content, encoding=encoding, etag=etag, pinned=is_pinned_url(url), path=path, size=size
+        )
+
+    @staticmethod
+    def copy_to(entry: CacheEntry, out: BinaryIO):
+        """Копирует содержимое записи в поток кусками"""
+        if entry.content is not None:
+            out.write(entry.content)
+            return
+        with open(entry.path, 'rb') as f:
+            shutil.copyfileobj(f, out, CHUNK_SIZE)
+
+    def put(self, url: str, content: bytes, encoding: Optional[str] = None, etag: Optional[str] = None):
+        self.put_stream(url, io.BytesIO(content), encoding, etag)
+
+    def put_stream(self, url: str, stream: BinaryIO, encoding: Optional[str] = None, etag: Optional[str] = None):
+        """Сохраняет содержимое потока с текущей позиции, читая его кусками"""
+        objects = os.path.join(self.root, 'objects')
+        fd, tmp_path = tempfile.mkstemp(dir=objects, suffix='.tmp')
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in iter(lambda: stream.read(CHUNK_SIZE), b''):
+                    digest.update(chunk)
+                    f.write(chunk)
+                    size += len(chunk)
+            sha = digest.hexdigest()
+            path = self._object_path(sha)
+            with self._lock:
+                if not os.path.exists(path):
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    os.replace(tmp_path, path)
+                self._db.execute(
+                    "INSERT OR REPLACE INTO objects (sha, size, last_used) VALUES (?, ?, ?)",
+                    (sha, size, time.time())
+                )
+                self._db.execute(
+                    "INSERT OR REPLACE INTO entries (url, sha, encoding, etag) VALUES (?, ?, ?, ?)",
+                    (url, sha, encoding, etag)
+                )
+                self._evict()
+                self._db.commit()
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _evict(self):
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM objects").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for sha, size in self._db.execute(
+                "SELECT sha, size FROM objects ORDER BY last_used").fetchall():
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(self._object_path(sha))
+            except OSError:
+                pass
+            self._db.execute("DELETE FROM objects WHERE sha = ?", (sha,))
+            self._db.execute("DELETE FROM entries WHERE sha = ?", (sha,))
+            total -= size
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'revalidated': self.revalidated,
+            'evictions': self.evictions,
+        }
@@ -0,0 +1,73 @@
+import threading
+from typing import Dict, List, Sequence, Tuple
+
+
+def is_available() -> bool:
+    try:
+        import flake8  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class InProcessFlake8:
+    """
+    Запускает flake8 внутри процесса на исходниках из памяти.
+
+    Использует те же плагины, конфиг (setup.cfg/tox.ini/.flake8) и фильтрацию
+    noqa/select/ignore, что и flake8 из командной строки, но без временного
+    файла, отдельного процесса и разбора stdout. Строки результата совпадают
+    с выводом CLI, только вместо пути к файлу стоит переданное имя.
+    """
+
+    def __init__(self, argv: Sequence[str] = ()):
+        from flake8.main.application import Application
+
+        self._app = Application()
+        self._app.initialize(list(argv))
+        self._lines: List[str] = []
+        # Формататор flake8 печатает в stdout, перехватываем строки в список
+        self._app.formatter._write = self._lines.append
+        self._lock = threading.Lock()
+
+    def check_source(self, source: str, filename: str) -> List[str]:
+        from flake8 import checker, processor
+
+        lines = source.splitlines(True)
+        options = self._app.options
+
+        class SourceChecker(checker.FileChecker):
+            def _make_processor(self):
+                return processor.FileProcessor(self.filename, self.options, lines=lines)
+
+        file_checker = SourceChecker(filename=filename, plugins=self._app.plugins.checkers, options=options)
+        display_name, results, _ = file_checker.run_checks()
+        results.sort(key=lambda result: (result[1], result[2]))
+
+        guide = self._app.guide
+        with self._lock:
+            self._lines.clear()
+            with guide.processing_file(display_name):
+                for error_code, line_number, column, text, physical_line in results:
+                    guide.handle_error(
+                        code=error_code,
+                        filename=display_name,
+                        line_number=line_number,
+                        column_number=column,
+                        text=text,
+                        physical_line=physical_line,
+                    )
+            return list(self._lines)
+
+
+_engines: Dict[Tuple[str, ...], InProcessFlake8] = {}
+_engines_lock = threading.Lock()
+
+
+def get_engine(argv: Sequence[str] = ()) -> InProcessFlake8:
+    """Движок на каждый набор аргументов создаётся один раз: загрузка плагинов недешёвая"""
+    key = tuple(argv)
+    with _engines_lock:
+        if key not in _engines:
+            _engines[key] = InProcessFlake8(key)
+        return _engines[key]
@@ -0,0 +1,304 @@
+import bisect
+import codecs
+import datetime as dt
+import os
+import re
+import subprocess
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import unquote
+
+# Адрес сырых файлов GitHub; переопределяется для локального сервера (benchmarks/bench_report.py)
+RAW_BASE_URL = os.environ.get('HACATON_RAW_BASE_URL', 'https://raw.githubusercontent.com').rstrip('/')
+
+# Заголовок ханка git diff: @@ -старые +начало[,число] @@
+_HUNK_RE = re.compile(r'^@@ -\S+ \+(\d+)(?:,(\d+))? @@')
+
+# Вывод diff не зависит от настроек пользователя (diff.noprefix, diff.mnemonicPrefix,
+# core.quotePath): префиксы a/ и b/ и пути в UTF-8 без экранирования
+_DIFF_OPTIONS = (
+    '-c', 'core.quotePath=false', 'diff', '--src-prefix=a/', '--dst-prefix=b/', '--no-color', '--no-ext-diff'
+)
+
+
+def _unquote_path(path: str) -> str:
+    """Путь из заголовка diff: кавычки и экранирование (\\t, \\", \\ooo) снимаются"""
+    if len(path) >= 2 and path[0] == path[-1] == '"':
+        return codecs.escape_decode(path[1:-1].encode('utf-8'))[0].decode('utf-8', errors='replace')
+    return path
+
+
+def github_url_to_path(url: str) -> Optional[str]:
+    """
+    Достаёт путь файла внутри репозитория из ссылки GitHub.
+
+    https://github.com/user/repo/blob/branch/path/to/file.py -> path/to/file.py
+    https://raw.githubusercontent.com/user/repo/branch/path/to/file.py -> path/to/file.py
+    https://raw.githubusercontent.com/user/repo/refs/heads/branch/path/to/file.py -> path/to/file.py
+
+    Путь раскодируется из URL: .../blob/master/sp%20ace.py -> sp ace.py
+    """
+    parts = url.split('/')
+    if len(parts) < 7:
+        return None
+    if parts[2] == 'github.com' and parts[5] == 'blob':
+        rest = parts[7:]
+    elif parts[2] == 'raw.githubusercontent.com':
+        rest = parts[8:] if parts[5] == 'refs' else parts[6:]
+    else:
+        return None
+    return unquote('/'.join(rest)) or None
+
+
+def github_raw_url(url: str) -> str:
+    """
+    Сырая ссылка для скачивания файла GitHub; остальные ссылки не меняются.
+
+    https://github.com/user/repo/blob/<sha>/path/to/file.py ->
+    https://raw.githubusercontent.com/user/repo/<sha>/path/to/file.py
+
+    Только по сырой ссылке на коммит кэш файлов (file_cache.is_pinned_url)
+    отдаёт файл без перепроверки в сети.
+    """
+    parts = url.split('/')
+    if len(parts) < 8 or parts[2] != 'github.com' or parts[5] != 'blob':
+        return url
+    return f"{RAW_BASE_URL}/{parts[3]}/{parts[4]}/{'/'.join(parts[6:])}"
+
+
+class BlobReader:
+    """
+    Читает содержимое файлов из локального репозитория одним процессом
+    git cat-file --batch вместо отдельного процесса или HTTP-запроса на файл.
+    """
+
+    def __init__(self, repo_path: str):
+        self.repo_path = repo_path
+
+    def read(self, commit: str, paths: Iterable[str]) -> Dict[str, Optional[bytes]]:
+        """Возвращает {путь: содержимое} на коммите commit; для отсутствующих файлов None"""
+        paths = list(dict.fromkeys(paths))
+        if not paths:
+            return {}
+        process = subprocess.Popen(
+            ['git', '-C', self.repo_path, 'cat-file', '--batch'],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE
+        )
+
+        # Запросы пишем из отдельного потока, чтобы git не упёрся в полный stdout
+        def write_requests():
+            try:
+                for path in paths:
+                    process.stdin.write(f"{commit}:{path}\n".encode('utf-8'))
+                process.stdin.close()
+            except BrokenPipeError:
+                pass
+
+        writer = threading.Thread(target=write_requests, daemon=True)
+        writer.start()
+
+        blobs = {}
+        try:
+            for path in paths:
+                header = process.stdout.readline().decode('utf-8', errors='replace').split()
+                if len(header) != 3 or header[1] != 'blob':
+                    # "<объект> missing" или не файл (например, каталог)
+                    if len(header) == 3:
+                        process.stdout.read(int(header[2]) + 1)
+                    blobs[path] = None
+                    continue
+                size = int(header[2])
+                blobs[path] = process.stdout.read(size)
+                process.stdout.read(1)  # завершающий перевод строки
+        finally:
+            writer.join()
+            process.stdout.close()
+            process.stderr.close()
+            process.wait()
+        return blobs
+
+
+def run_git(repo_path: str, *args: str) -> str:
+    result = subprocess.run(
+        ['git', '-C', repo_path, *args],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        encoding='utf-8',
+        errors='replace'
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Git error: {result.stderr.strip()}")
+    return result.stdout
+
+
+class CommitIndex:
+    """
+    Индекс коммитов репозитория по дате, построенный одним проходом git log.
+
+    Отвечает на вопрос "последний коммит до даты" (как git log --until -n 1)
+    бинарным поиском. Если HEAD продвинулся линейно (fast-forward без
+    слияний), дочитываются только новые коммиты, иначе индекс строится заново.
+    Результаты git diff (numstat и изменённые строки) кэшируются по паре
+    коммитов: для неизменяемых SHA они не меняются.
+    """
+
+    def __init__(self, repo_path: str, refresh_interval: float = 2.0, diff_cache_size: int = 4096):
+        self.repo_path = repo_path
+        self.refresh_interval = refresh_interval
+        self.diff_cache_size = diff_cache_size
+        self._head = None
+        self._checked_at = 0.0
+        self._shas: List[str] = []
+        self._times: List[int] = []
+        # Минус префиксный минимум времени коммита в порядке git log:
+        # неубывающий, поэтому по нему можно искать бинарным поиском
+        self._neg_min_times: List[int] = []
+        self._diff_cache: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _read_log(self, *revisions: str) -> Tuple[List[str], List[int]]:
+        shas, times = [], []
+        for line in run_git(self.repo_path, 'log', '--format=%H %ct', *revisions).splitlines():
+            sha, _, timestamp = line.partition(' ')
+            if sha:
+                shas.append(sha)
+                times.append(int(timestamp))
+        return shas, times
+
+    def _rebuild_minimums(self):
+        self._neg_min_times = []
+        current = None
+        for timestamp in self._times:
+            current = timestamp if current is None else min(current, timestamp)
+            self._neg_min_times.append(-current)
+
+    def refresh(self, force: bool = False):
+        """Дочитывает новые коммиты, если HEAD сдвинулся"""
+        with self._lock:
+            now = time.monotonic()
+            if not force and self._head is not None and now - self._checked_at < self.refresh_interval:
+                return
+            self._checked_at = now
+            head = run_git(self.repo_path, 'rev-parse', 'HEAD').strip()
+            if head == self._head:
+                return
+            if self._head is not None and self._is_fast_forward(self._head, head):
+                # Линейные коммиты поверх прежнего HEAD: git log от нового HEAD
+                # даёт их, а затем прежнюю историю в том же порядке
+                shas, times = self._read_log(f"{self._head}..{head}")
+                self._shas, self._times = shas + self._shas, times + self._times
+            else:
+                # Откат, слияние или переписанная история: срез прежнего списка может
+                # содержать коммиты не из истории нового HEAD, поэтому читаем всё заново
+                self._shas, self._times = self._read_log(head)
+            self._head = head
+            self._rebuild_minimums()
+
+    def _is_ancestor(self, ancestor: str, commit: str) -> bool:
+        result = subprocess.run(
+            ['git', '-C', self.repo_path, 'merge-base', '--is-ancestor', ancestor, commit],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        )
+        return result.returncode == 0
+
+    def _is_fast_forward(self, old: str, new: str) -> bool:
+        """new - потомок old, и между ними нет merge-коммитов"""
+        if not self._is_ancestor(old, new):
+            return False
+        return not run_git(self.repo_path, 'rev-list', '--merges', '-n', '1', f"{old}..{new}").strip()
+
+    def commit_before(self, target_date: dt.datetime) -> str:
+        """Последний коммит (в порядке git log от HEAD) не позже target_date или пустая строка"""
+        self.refresh()
+        timestamp = int(target_date.timestamp())
+        with self._lock:
+            position = bisect.bisect_left(self._neg_min_times, -timestamp)
+            return self._shas[position] if position < len(self._shas) else ""
+
+    def numstat(self, base: str, head: str, diff_filter: str = 'AM') -> List[Tuple[int, int, str]]:
+        """(добавлено, удалено, путь) для каждого файла в base..head; бинарные файлы дают 0"""
+        key = ('numstat', base, head, diff_filter)
+        cached = self._recall(key)
+        if cached is not None:
+            return cached
+        # -z: пути без кавычек и экранирования, записи разделены NUL
+        output = run_git(
+            self.repo_path, *_DIFF_OPTIONS, '--numstat', '-z', f"--diff-filter={diff_filter}", f"{base}..{head}"
+        )
+        stats = []
+        for record in output.split('\0'):
+            parts = record.split('\t', 2)
+            if len(parts) == 3:
+                added = int(parts[0]) if parts[0].isdigit() else 0
+                deleted = int(parts[1]) if parts[1].isdigit() else 0
+                stats.append((added, deleted, parts[2]))
+        self._remember(key, stats)
+        return stats
+
+    def changed_lines(self, base: str, head: str, diff_filter: str = 'AM') -> Dict[str, List[Tuple[int, int]]]:
+        """
+        {путь: [(первая, последняя строка), ...]} добавленных и изменённых
+        строк в head относительно base (по git diff -U0). Удалённые строки
+        в head не видны, поэтому в диапазоны не попадают.
+        """
+        key = ('hunks', base, head, diff_filter)
+        cached = self._recall(key)
+        if cached is not None:
+            return cached
+        output = run_git(self.repo_path, *_DIFF_OPTIONS, '-U0', f"--diff-filter={diff_filter}", f"{base}..{head}")
+        ranges: Dict[str, List[Tuple[int, int]]] = {}
+        path = None
+        for line in output.split('\n'):
+            if line.startswith('+++ '):
+                # Путь с пробелом git дополняет табуляцией, с особыми символами - берёт в кавычки
+                name = _unquote_path(line[4:].rstrip('\t'))
+                path = name[2:] if name.startswith('b/') else None
+                if path is not None:
+                    ranges.setdefault(path, [])
+            elif line.startswith('@@') and path is not None:
+                match = _HUNK_RE.match(line)
+                if match:
+                    start = int(match.group(1))
+                    count = int(match.group(2)) if match.group(2) is not None else 1
+                    if count:
+                        ranges[path].append((start, start + count - 1))
+        self._remember(key, ranges)
+        return ranges
+
+    def _recall(self, key):
+        with self._lock:
+            if key not in self._diff_cache:
+                return None
+            self._diff_cache.move_to_end(key)
+            return self._diff_cache[key]
+
+    def _remember(self, key, value):
+        with self._lock:
+            self._diff_cache[key] = value
+            if len(self._diff_cache) > self.diff_cache_size:
+                self._diff_cache.popitem(last=False)
+
+
+def in_ranges(line: int, ranges: List[Tuple[int, int]]) -> bool:
+    """Попадает ли строка в один из отсортированных непересекающихся диапазонов [начало, конец]"""
+    position = bisect.bisect_left(ranges, (line + 1,)) - 1
+    return position >= 0 and ranges[position][0] <= line <= ranges[position][1]
+
+
+_indexes: Dict[str, CommitIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_commit_index(repo_path: str) -> CommitIndex:
+    """Один индекс на репозиторий в процессе"""
+    key = os.path.abspath(repo_path)
+    with _indexes_lock:
+        if key not in _indexes:
+            _indexes[key] = CommitIndex(key)
+        return _indexes[key]
@@ -0,0 +1,178 @@
+"""
+Замеры этапов анализа: время, CPU, байты и количества.
+
+    recorder = Recorder()
+    with recorder.span('download', url=url) as span:
+        ...
+        span['bytes'] = len(content)
+
+Каждый замер сохраняется как span (имя, начало, длительность, CPU потока,
+атрибуты) и добавляется к итогам по имени. Выгрузка - JSON trace в формате
+Chrome Trace Event (открывается в chrome://tracing и Perfetto) и текст
+метрик в формате Prometheus. Атрибуты bytes и count суммируются в итогах.
+"""
+import contextlib
+import json
+import os
+import threading
+import time
+from typing import Dict, Iterator, List, Optional
+
+
+class Recorder:
+    """
+    Потокобезопасный сборщик замеров. Итоги копятся всегда, а отдельные
+    span хранятся до max_spans штук, чтобы долгоживущий процесс не рос.
+    Если задан parent, замеры дублируются в него (например, в общий
+    сборщик процесса для /metrics сервиса).
+    """
+
+    def __init__(self, max_spans: int = 10000, parent: Optional['Recorder'] = None):
+        self.max_spans = max_spans
+        self.parent = parent
+        self.spans: List[Dict] = []
+        self.dropped = 0
+        self.totals: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def span(self, name: str, **attributes) -> Iterator[Dict]:
+        """Замеряет блок; в возвращённый словарь можно дописать атрибуты (bytes, count, ...)"""
+        started_at = time.time()
+        started = time.perf_counter()
+        cpu_started = time.thread_time()
+        try:
+            yield attributes
+        except BaseException as e:
+            attributes['error'] = type(e).__name__
+            raise
+        finally:
+            self.record(
+                name,
+                time.perf_counter() - started,
+                cpu=time.thread_time() - cpu_started,
+                started_at=started_at,
+                **attributes
+            )
+
+    def record(self, name: str, duration: float, cpu: float = 0.0, started_at: Optional[float] = None, **attributes):
+        """Добавляет готовый замер (например, latency из DownloadResult)"""
+        if started_at is None:
+            started_at = time.time() - duration
+        with self._lock:
+            if len(self.spans) < self.max_spans:
+                self.spans.append({
+                    'name': name,
+                    'start': started_at,
+                    'duration': duration,
+                    'cpu': cpu,
+                    'thread': threading.get_ident(),
+                    'attributes': attributes,
+                })
+            else:
+                self.dropped += 1
+            total = self.totals.setdefault(
+                name, {'calls': 0, 'seconds': 0.0, 'cpu_seconds': 0.0, 'bytes': 0, 'count': 0, 'errors': 0}
+            )
+            total['calls'] += 1
+            total['seconds'] += duration
+            total['cpu_seconds'] += cpu
+            total['bytes'] += attributes.get('bytes') or 0
+            total['count'] += attributes.get('count') or 0
+            total['errors'] += 1 if attributes.get('error') else 0
+        if self.parent is not None:
+            self.parent.record(name, duration, cpu, started_at, **attributes)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {name: dict(total) for name, total in self.totals.items()}
+
+    def format_summary(self) -> str:
+        """Таблица итогов по этапам, самые долгие сверху"""
+        totals = sorted(self.summary().items(), key=lambda item: -item[1]['seconds'])
+        lines = [f"{'этап':<16} {'вызовов':>8} {'время, с':>10} {'CPU, с':>8} {'байт':>12} {'элементов':>10}"]
+        for name, total in totals:
+            lines.append(
+                f"{name:<16} {total['calls']:>8} {total['seconds']:>10.3f} {total['cpu_seconds']:>8.3f} "
+                f"{total['bytes']:>12} {total['count']:>10}"
+            )
+        return '\n'.join(lines)
+
+    def to_trace(self) -> Dict:
+        """Chrome Trace Event: полные события (ph=X) с временем в микросекундах"""
+        with self._lock:
+            spans = list(self.spans)
+        pid = os.getpid()
+        events = [
+            {
+                'name': span['name'],
+                'ph': 'X',
+                'ts': int(span['start'] * 1e6),
+                'dur': int(span['duration'] * 1e6),
+                'pid': pid,
+                'tid': span['thread'],
+                'args': {'cpu_ms': round(span['cpu'] * 1000, 3), **span['attributes']},
+            }
+            for span in spans
+        ]
+        return {'traceEvents': events, 'displayTimeUnit': 'ms', 'otherData': {'dropped_spans': self.dropped}}
+
+    def write_trace(self, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_trace(), f, ensure_ascii=False, default=str)
+
+    def to_prometheus(self, prefix: str = 'hacaton') -> str:
+        """Итоги по этапам в текстовом формате Prometheus"""
+        metrics = (
+            ('stage_calls_total', 'calls', 'Число замеров этапа'),
+            ('stage_seconds_total', 'seconds', 'Суммарное время этапа, с'),
+            ('stage_cpu_seconds_total', 'cpu_seconds', 'Суммарное CPU-время потока на этапе, с'),
+            ('stage_bytes_total', 'bytes', 'Байт обработано на этапе'),
+            ('stage_items_total', 'count', 'Элементов (файлов, проблем) обработано на этапе'),
+            ('stage_errors_total', 'errors', 'Замеров, завершившихся исключением'),
+        )
+        totals = self.summary()
+        lines = []
+        for metric, field, description in metrics:
+            lines.append(f"# HELP {prefix}_{metric} {description}")
+            lines.append(f"# TYPE {prefix}_{metric} counter")
+            for name, total in sorted(totals.items()):
+                lines.append(f'{prefix}_{metric}{{stage="{name}"}} {total[field]:g}')
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(self.to_prometheus())
+
+
+@contextlib.contextmanager
+def cprofile(path: Optional[str]):
+    """
+    Профилирует блок cProfile и сохраняет статистику в path (pstats/snakeviz).
+    Без path ничего не делает. Профилируется только текущий поток.
+    """
+    if not path:
+        yield None
+        return
+    import cProfile
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
+
+
+_default_recorder = None
+_default_lock = threading.Lock()
+
+
+def get_default_recorder() -> Recorder:
+    """Общий сборщик процесса: в него попадают замеры всех отчётов"""
+    global _default_recorder
+    with _default_lock:
+        if _default_recorder is None:
+            _default_recorder = Recorder()
+        return _default_recorder
@@ -0,0 +1,186 @@
+from array import array
+from collections import Counter
+from collections.abc import Sequence
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from linters import LintIssue
+
+# С какого числа проблем подсчёты идут через numpy (если он есть): на малых
+# таблицах импорт numpy дороже самого подсчёта
+NUMPY_MIN_ROWS = 10000
+
+# Уровень серьёзности по префиксу кода (flake8 и rubocop); остальное - warning
+SEVERITY_PREFIXES: Tuple[Tuple[str, str], ...] = (
+    ('E9', 'error'),
+    ('F', 'error'),
+    ('E', 'warning'),
+    ('W', 'warning'),
+    ('C', 'convention'),
+    ('N', 'convention'),
+    ('D', 'convention'),
+    ('Security/', 'error'),
+    ('Lint/', 'warning'),
+    ('Style/', 'convention'),
+    ('Layout/', 'convention'),
+    ('Naming/', 'convention'),
+)
+
+
+def severity(code: str) -> str:
+    for prefix, level in SEVERITY_PREFIXES:
+        if code.startswith(prefix):
+            return level
+    return 'warning'
+
+
+def bincount(column: array, size: int) -> List[int]:
+    """
+    Число вхождений каждого номера 0..size-1 в колонке номеров. Большие
+    колонки считаются np.bincount прямо по буферу array без копирования,
+    малые (или без numpy) - Counter.
+    """
+    if len(column) >= NUMPY_MIN_ROWS:
+        try:
+            import numpy as np
+        except ImportError:
+            np = None
+        if np is not None:
+            return np.bincount(np.frombuffer(column, dtype=f"u{column.itemsize}"), minlength=size).tolist()
+    counts = Counter(column)
+    return [counts[index] for index in range(size)]
+
+
+class _Interner:
+    """Строки хранятся один раз, в колонках - их номера"""
+
+    def __init__(self):
+        self.values: List[str] = []
+        self.ids: Dict[str, int] = {}
+
+    def intern(self, value: str) -> int:
+        index = self.ids.get(value)
+        if index is None:
+            index = self.ids[value] = len(self.values)
+            self.values.append(value)
+        return index
+
+
+class IssueTable:
+    """
+    Проблемы линтера в колоночном виде.
+
+    Пути файлов, коды и сообщения хранятся в словарях по одному разу, а
+    сами проблемы - пятью массивами целых чисел (файл, строка, столбец,
+    код, сообщение), примерно 20 байт на проблему вместо строки и кортежа.
+    Подсчёты по кодам, файлам и уровням серьёзности - это bincount по
+    колонке номеров (numpy на больших таблицах), без сборки LintIssue;
+    LintIssue и строки собираются только при обходе.
+    """
+
+    def __init__(self, issues: Iterable[LintIssue] = ()):
+        self._files = _Interner()
+        self._codes = _Interner()
+        self._messages = _Interner()
+        self.file_ids = array('I')
+        self.lines = array('I')
+        self.cols = array('I')
+        self.code_ids = array('I')
+        self.message_ids = array('I')
+        self.extend(issues)
+
+    def append(self, issue: LintIssue):
+        self.file_ids.append(self._files.intern(issue.file))
+        self.lines.append(max(0, issue.line))
+        self.cols.append(max(0, issue.col))
+        self.code_ids.append(self._codes.intern(issue.code))
+        self.message_ids.append(self._messages.intern(issue.message))
+
+    def extend(self, issues: Iterable[LintIssue]):
+        for issue in issues:
+            self.append(issue)
+
+    def __len__(self) -> int:
+        return len(self.lines)
+
+    def __getitem__(self, index: int) -> LintIssue:
+        return LintIssue(
+            self._files.values[self.file_ids[index]],
+            self.lines[index],
+            self.cols[index],
+            self._codes.values[self.code_ids[index]],
+            self._messages.values[self.message_ids[index]],
+        )
+
+    def __iter__(self) -> Iterator[LintIssue]:
+        for index in range(len(self)):
+            yield self[index]
+
+    @property
+    def files(self) -> List[str]:
+        return self._files.values
+
+    @property
+    def codes(self) -> List[str]:
+        return self._codes.values
+
+    def lines_view(self) -> 'IssueLines':
+        """Проблемы в виде строк линтера, собираемых по запросу"""
+        return IssueLines(self)
+
+    def by_file(self) -> Dict[str, List[LintIssue]]:
+        grouped: Dict[str, List[LintIssue]] = {}
+        for issue in self:
+            grouped.setdefault(issue.file, []).append(issue)
+        return grouped
+
+    def count_by_code(self) -> Dict[str, int]:
+        """{код: число проблем} в порядке первого появления кода"""
+        # Номера выдаются в порядке первого появления, и у каждого есть хотя бы одна проблема
+        return dict(zip(self._codes.values, bincount(self.code_ids, len(self._codes.values))))
+
+    def count_by_file(self) -> Dict[str, int]:
+        return dict(zip(self._files.values, bincount(self.file_ids, len(self._files.values))))
+
+    def count_by_severity(self) -> Dict[str, int]:
+        """Уровень вычисляется один раз на код, а не на проблему"""
+        totals: Dict[str, int] = {}
+        for code, count in self.count_by_code().items():
+            level = severity(code)
+            totals[level] = totals.get(level, 0) + count
+        return totals
+
+    def nbytes(self) -> int:
+        """Размер колонок в байтах (без словарей строк)"""
+        columns = (self.file_ids, self.lines, self.cols, self.code_ids, self.message_ids)
+        return sum(column.itemsize * len(column) for column in columns)
+
+
+class IssueLines(Sequence):
+    """Только для чтения: строки проблем из IssueTable, собираются при обращении"""
+
+    def __init__(self, table: IssueTable):
+        self._table = table
+
+    def __len__(self) -> int:
+        return len(self._table)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [str(self._table[i]) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return str(self._table[index])
+
+    def __iter__(self) -> Iterator[str]:
+        for issue in self._table:
+            yield str(issue)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (list, tuple, IssueLines)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"IssueLines({len(self)} issues)"
@@ -0,0 +1,254 @@
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import subprocess
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from file_cache import DEFAULT_CACHE_DIR
+from linters import LintIssue
+
+# Проблема без пути к файлу: (строка, столбец, код, сообщение)
+CachedIssue = Tuple[int, int, str, str]
+
+# Файлы настроек линтеров в рабочем каталоге, влияющие на результат
+LINTER_CONFIG_FILES = (
+    'setup.cfg', 'tox.ini', '.flake8',
+    '.eslintrc', '.eslintrc.js', '.eslintrc.json', '.eslintrc.yml', 'eslint.config.js',
+    '.rubocop.yml', 'phpcs.xml', 'phpcs.xml.dist',
+)
+
+
+def blob_sha(content: bytes) -> str:
+    """SHA-1 содержимого так же, как его считает git для blob-объекта"""
+    return hashlib.sha1(b'blob %d\0' % len(content) + content).hexdigest()
+
+
+def blob_sha_file(path: str) -> str:
+    """blob_sha файла на диске, читая его кусками"""
+    digest = hashlib.sha1(b'blob %d\0' % os.path.getsize(path))
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _file_identity(path: str) -> Optional[List]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [os.path.abspath(path), stat.st_size, stat.st_mtime_ns]
+
+
+def _file_digest(path: str) -> Optional[str]:
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.sha1(f.read()).hexdigest()
+    except OSError:
+        return None
+
+
+def _config_digests() -> Dict[str, Optional[str]]:
+    """SHA-1 файлов настроек линтеров в текущем рабочем каталоге"""
+    return {name: _file_digest(name) for name in LINTER_CONFIG_FILES if os.path.isfile(name)}
+
+
+_versions: Dict[str, str] = {}
+_versions_lock = threading.Lock()
+
+
+def _tool_version(command: str, binary: Optional[List]) -> str:
+    """Вывод `<линтер> --version`; запускается один раз на процесс для каждого бинарника"""
+    key = json.dumps([command, binary])
+    with _versions_lock:
+        if key in _versions:
+            return _versions[key]
+    try:
+        result = subprocess.run(
+            command.split()[:1] + ['--version'],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            timeout=30
+        )
+        version = result.stdout.strip()
+    except (OSError, subprocess.TimeoutExpired):
+        version = 'unknown'
+    with _versions_lock:
+        _versions[key] = version
+    return version
+
+
+def config_fingerprint(language: str, command: str, configs: Optional[Dict[str, Optional[str]]] = None) -> str:
+    """
+    Отпечаток линтера: команда, путь/размер/время изменения его бинарника
+    и файлов из аргументов (например, jar и xml checkstyle), вывод --version
+    и содержимое файлов настроек в рабочем каталоге. Обновление линтера или
+    его настроек меняет отпечаток, и старые результаты перестают
+    использоваться. configs - уже посчитанные _config_digests().
+    """
+    tokens = command.split()
+    binary = _file_identity(shutil.which(tokens[0]) or tokens[0]) if tokens else None
+    payload = {
+        'language': language,
+        'command': command,
+        'binary': binary,
+        'arguments': [_file_identity(token) for token in tokens[1:] if os.path.isfile(token)],
+        'version': _tool_version(command, binary) if tokens else '',
+        'configs': _config_digests() if configs is None else configs,
+    }
+    return hashlib.sha1(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def strip_issues(issues: List[LintIssue]) -> List[CachedIssue]:
+    return [(issue.line, issue.col, issue.code, issue.message) for issue in issues]
+
+
+def restore_issues(cached: List[CachedIssue], file: str) -> List[LintIssue]:
+    return [LintIssue(file, line, col, code, message) for line, col, code, message in cached]
+
+
+class LintResultCache:
+    """
+    Результаты линтера по (SHA содержимого, отпечаток линтера) в SQLite.
+
+    Хранятся проблемы без пути к файлу, поэтому одинаковое содержимое из
+    разных MR, по разным ссылкам и в разных запусках линтится один раз.
+    Когда для той же команды линтера с теми же настройками появляется
+    новый отпечаток (обновился бинарник или его версия), старые записи
+    этой команды удаляются. Результаты с другими настройками (например,
+    другого рабочего каталога) не удаляются, а вытесняются при превышении
+    max_entries вместе с остальными давно не использованными записями.
+    """
+
+    def __init__(self, path: str = os.path.join(DEFAULT_CACHE_DIR, 'lint.sqlite'), max_entries: int = 200000):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.invalidated = 0
+        self.evictions = 0
+        self._known_fingerprints: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS results (
+                sha TEXT NOT NULL,
+                fingerprint TEXT NOT NULL,
+                issues TEXT NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (sha, fingerprint)
+            );
+            CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used);
+            CREATE TABLE IF NOT EXISTS linters (
+                command TEXT PRIMARY KEY,
+                fingerprint TEXT NOT NULL
+            );
+        """)
+        self._db.commit()
+
+    def register(self, command_key: str, fingerprint: str):
+        """
+        Запоминает актуальный отпечаток для команды линтера и удаляет
+        результаты предыдущего, если он изменился.
+        """
+        with self._lock:
+            if self._known_fingerprints.get(command_key) == fingerprint:
+                return
+            row = self._db.execute("SELECT fingerprint FROM linters WHERE command = ?", (command_key,)).fetchone()
+            if row is not None and row[0] != fingerprint:
+                cursor = self._db.execute("DELETE FROM results WHERE fingerprint = ?", (row[0],))
+                self.invalidated += cursor.rowcount
+            self._db.execute(
+                "INSERT OR REPLACE INTO linters (command, fingerprint) VALUES (?, ?)", (command_key, fingerprint)
+            )
+            self._db.commit()
+            self._known_fingerprints[command_key] = fingerprint
+
+    def get(self, sha: str, fingerprint: str) -> Optional[List[CachedIssue]]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT issues FROM results WHERE sha = ? AND fingerprint = ?", (sha, fingerprint)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._db.execute(
+                "UPDATE results SET last_used = ? WHERE sha = ? AND fingerprint = ?", (time.time(), sha, fingerprint)
+            )
+            self._db.commit()
+        return [tuple(issue) for issue in json.loads(row[0])]
+
+    def put(self, sha: str, fingerprint: str, issues: List[CachedIssue]):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO results (sha, fingerprint, issues, last_used) VALUES (?, ?, ?, ?)",
+                (sha, fingerprint, json.dumps(issues, ensure_ascii=False), time.time())
+            )
+            self._evict()
+            self._db.commit()
+
+    def _evict(self):
+        count = self._db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        if count <= self.max_entries:
+            return
+        # Удаляем с запасом в 10%, чтобы не чистить на каждой записи
+        excess = count - int(self.max_entries * 0.9)
+        self._db.execute(
+            "DELETE FROM results WHERE rowid IN (SELECT rowid FROM results ORDER BY last_used LIMIT ?)", (excess,)
+        )
+        self.evictions += excess
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM results")
+            self._db.execute("DELETE FROM linters")
+            self._db.commit()
+            self._known_fingerprints.clear()
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / lookups if lookups else 0.0,
+            'invalidated': self.invalidated,
+            'evictions': self.evictions,
+        }
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def get_default_lint_cache() -> LintResultCache:
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = LintResultCache()
+        return _default_cache
+
+
+def get_fingerprint(language: str, command: str, cache: LintResultCache) -> str:
+    """
+    Отпечаток линтера, зарегистрированный в кэше. Считается заново при
+    каждом вызове (stat файлов дешёвый), поэтому долгоживущий процесс тоже
+    замечает обновление линтера; --version запускается только при смене
+    бинарника.
+
+    Настройки рабочего каталога входят и в ключ команды: процессы с общим
+    кэшем, запущенные из разных каталогов (демон и пакет), не удаляют
+    результаты друг друга на каждом отчёте.
+    """
+    configs = _config_digests()
+    fingerprint = config_fingerprint(language, command, configs)
+    configs_key = hashlib.sha1(json.dumps(configs, sort_keys=True).encode('utf-8')).hexdigest()
+    cache.register(f"{language}\0{command}\0{configs_key}", fingerprint)
+    return fingerprint
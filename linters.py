@@ -0,0 +1,307 @@
+import json
+import os
+import re
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+from xml.etree import ElementTree
+
+# Ограничение длины командной строки: в Windows это 32767 символов,
+# берём с запасом, чтобы хватило и на саму команду линтера
+MAX_COMMAND_CHARS = 30000
+
+# Сколько секунд ждать один запуск линтера, прежде чем убить его
+DEFAULT_JOB_TIMEOUT = 300.0
+
+
+def chunk_files(
+        files: Dict[str, str],
+        command: str,
+        limit: int = MAX_COMMAND_CHARS,
+        max_files: Optional[int] = None
+) -> List[Dict[str, str]]:
+    """
+    Делит файлы {url: локальный путь} на пачки, каждая из которых
+    помещается в одну командную строку линтера и содержит не больше
+    max_files файлов.
+    """
+    chunks = []
+    current = {}
+    length = len(command)
+    for url, path in files.items():
+        cost = len(path) + 3  # пробел и возможные кавычки
+        if current and (length + cost > limit or (max_files and len(current) >= max_files)):
+            chunks.append(current)
+            current = {}
+            length = len(command)
+        current[url] = path
+        length += cost
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+class LintIssue(NamedTuple):
+    """Одна проблема линтера в разобранном виде"""
+    file: str
+    line: int
+    col: int
+    code: str
+    message: str
+
+    def __str__(self) -> str:
+        if not self.file:
+            return self.message
+        return f"{self.file}:{self.line}:{self.col}: {self.code} {self.message}"
+
+
+# Формат flake8 по умолчанию: путь:строка:столбец: КОД сообщение.
+# Путь ищется лениво, поэтому двоеточия в URL и в C:\ ему не мешают
+_FLAKE8_RE = re.compile(r'^(?P<file>.+?):(?P<line>\d+):(?P<col>\d+): (?P<code>[A-Z]+\d+) (?P<message>.*)$')
+
+
+def _parse_text_line(line: str) -> LintIssue:
+    match = _FLAKE8_RE.match(line)
+    if match:
+        return LintIssue(
+            match.group('file'), int(match.group('line')), int(match.group('col')),
+            match.group('code'), match.group('message')
+        )
+    return LintIssue('', 0, 0, '', line)
+
+
+def parse_flake8(output: str) -> List[LintIssue]:
+    return [_parse_text_line(line) for line in output.splitlines() if line.strip()]
+
+
+def parse_eslint_json(output: str) -> List[LintIssue]:
+    issues = []
+    for file_result in json.loads(output):
+        for message in file_result.get('messages', []):
+            issues.append(LintIssue(
+                file_result.get('filePath', ''), message.get('line', 0), message.get('column', 0),
+                message.get('ruleId') or 'eslint', message.get('message', '')
+            ))
+    return issues
+
+
+def parse_rubocop_json(output: str) -> List[LintIssue]:
+    issues = []
+    for file_result in json.loads(output).get('files', []):
+        for offense in file_result.get('offenses', []):
+            location = offense.get('location', {})
+            issues.append(LintIssue(
+                file_result.get('path', ''), location.get('line', 0), location.get('column', 0),
+                offense.get('cop_name', ''), offense.get('message', '')
+            ))
+    return issues
+
+
+def parse_phpcs_json(output: str) -> List[LintIssue]:
+    issues = []
+    for path, file_result in json.loads(output).get('files', {}).items():
+        for message in file_result.get('messages', []):
+            issues.append(LintIssue(
+                path, message.get('line', 0), message.get('column', 0),
+                message.get('source', ''), message.get('message', '')
+            ))
+    return issues
+
+
+def parse_checkstyle_xml(output: str) -> List[LintIssue]:
+    # Checkstyle может вывести что-то до XML, отрезаем всё до заголовка
+    root = ElementTree.fromstring(output[output.find('<'):])
+    issues = []
+    for file_node in root.iter('file'):
+        for error in file_node.iter('error'):
+            # com.puppycrawl.tools.checkstyle.checks.imports.AvoidStarImportCheck -> AvoidStarImport
+            code = error.get('source', '').rsplit('.', 1)[-1]
+            if code.endswith('Check'):
+                code = code[:-len('Check')]
+            issues.append(LintIssue(
+                file_node.get('name', ''), int(error.get('line', 0)), int(error.get('column', 0)),
+                code, error.get('message', '')
+            ))
+    return issues
+
+
+# Машиночитаемый формат вывода и его разбор для каждого языка
+OUTPUT_FORMATS = {
+    'python': ('', parse_flake8),
+    'javascript': ('-f json', parse_eslint_json),
+    'ruby': ('--format json', parse_rubocop_json),
+    'php': ('--report=json', parse_phpcs_json),
+    'java': ('-f xml', parse_checkstyle_xml),
+}
+
+
+def get_output_format(language: str, command: str) -> Tuple[str, Callable[[str], List[LintIssue]]]:
+    """Команда линтера с флагами машиночитаемого формата и разборщик его вывода"""
+    format_args, parser = OUTPUT_FORMATS.get(language, ('', parse_flake8))
+    if format_args and format_args not in command:
+        command = f"{command} {format_args}"
+    return command, parser
+
+
+class LinterError(RuntimeError):
+    """Линтер упал или отверг настройки: его вывод нельзя считать списком проблем"""
+
+
+def _normalize_path(path: str) -> str:
+    return os.path.normcase(os.path.abspath(path))
+
+
+def run_linter_command(
+        command: str,
+        files: Dict[str, str],
+        parser: Callable[[str], List[LintIssue]] = parse_flake8,
+        timeout: Optional[float] = None
+) -> List[Tuple[Optional[str], LintIssue]]:
+    """
+    Запускает линтер одним процессом на все переданные файлы.
+
+    Возвращает пары (url, проблема). url определяется по пути файла в
+    разобранной записи; для записей без известного пути он None. По
+    истечении timeout процесс линтера убивается и бросается
+    subprocess.TimeoutExpired.
+
+    LinterError бросается, если вывод не разбирается, если линтер писал
+    только в stderr или завершился с ненулевым кодом без вывода: иначе
+    упавший линтер выглядел бы как проверка без проблем.
+    """
+    cmd = command.split() + list(files.values())
+    result = subprocess.run(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        encoding='utf-8',
+        check=False,  # Не бросаем исключение при ненулевом коде возврата
+        timeout=timeout
+    )
+
+    output = result.stdout.strip()
+    stderr = result.stderr.strip()
+    if not output:
+        if stderr:
+            raise LinterError(f"код {result.returncode}: {stderr}")
+        if result.returncode != 0:
+            raise LinterError(f"код {result.returncode} без вывода")
+        return []
+
+    try:
+        issues = parser(output)
+    except (ValueError, TypeError, KeyError, AttributeError, ElementTree.ParseError) as e:
+        raise LinterError(f"код {result.returncode}, вывод не разобран ({e}): {output[:2000]}") from e
+
+    url_by_path = {_normalize_path(path): url for url, path in files.items()}
+    return [(url_by_path.get(_normalize_path(issue.file)) if issue.file else None, issue) for issue in issues]
+
+
+def find_antipatterns(issues: Iterable[LintIssue], antipatterns: Dict[str, str]) -> List[str]:
+    """
+    Ищет описания антипаттернов по кодам проблем через словарь, а не перебором.
+
+    Код сравнивается целиком (E50 не совпадает с E501), а для составных кодов
+    вроде Generic.Files.LineLength.TooLong или Layout/LineLength проверяются
+    также их префиксы по разделителям.
+    """
+    return find_antipatterns_by_codes((issue.code for issue in issues), antipatterns)
+
+
+def find_antipatterns_by_codes(codes: Iterable[str], antipatterns: Dict[str, str]) -> List[str]:
+    """То же, что find_antipatterns, но по кодам (например, уникальным кодам IssueTable)"""
+    found = {}
+    seen_codes = set()
+    for code in codes:
+        if not code or code in seen_codes:
+            continue
+        seen_codes.add(code)
+        candidate = code
+        while candidate:
+            description = antipatterns.get(candidate)
+            if description is not None:
+                found[description] = None
+                break
+            cut = max(candidate.rfind('.'), candidate.rfind('/'))
+            candidate = candidate[:cut] if cut > 0 else ''
+    return list(found)
+
+
+@dataclass
+class LintJob:
+    """Один запуск линтера на пачку файлов {url: локальный путь}"""
+    command: str
+    files: Dict[str, str]
+    parser: Callable[[str], List[LintIssue]] = parse_flake8
+
+    @property
+    def weight(self) -> int:
+        total = 0
+        for path in self.files.values():
+            try:
+                total += os.path.getsize(path)
+            except OSError:
+                pass
+        return total
+
+
+@dataclass
+class LintJobResult:
+    job: LintJob
+    issues: List[Tuple[Optional[str], LintIssue]] = field(default_factory=list)
+    error: Optional[Exception] = None
+    duration: float = 0.0
+
+
+class LintScheduler:
+    """
+    Выполняет запуски линтеров параллельно.
+
+    Каждый линтер и так работает отдельным процессом, поэтому пулу потоков
+    достаточно их запускать и ждать: размер пула по умолчанию равен числу
+    ядер. Самые тяжёлые (по размеру файлов) задания стартуют первыми, а
+    результаты возвращаются в исходном порядке заданий, поэтому вывод не
+    зависит от того, какой линтер закончил раньше.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, timeout: float = DEFAULT_JOB_TIMEOUT):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.timeout = timeout
+
+    def _run_job(self, job: LintJob) -> LintJobResult:
+        result = LintJobResult(job=job)
+        started = time.perf_counter()
+        try:
+            result.issues = run_linter_command(job.command, job.files, job.parser, self.timeout)
+        except Exception as e:
+            result.error = e
+        result.duration = time.perf_counter() - started
+        return result
+
+    def split(self, files: Dict[str, str], command: str, batch: bool = True) -> List[Dict[str, str]]:
+        """Делит файлы на задания так, чтобы загрузить все потоки пула"""
+        if not batch:
+            return [{url: path} for url, path in files.items()]
+        per_job = -(-len(files) // self.max_workers) if files else None
+        return chunk_files(files, command, max_files=per_job)
+
+    def run(
+            self,
+            jobs: List[LintJob],
+            on_result: Optional[Callable[[LintJobResult], None]] = None
+    ) -> List[LintJobResult]:
+        """on_result вызывается для каждого задания сразу по его завершении"""
+        if not jobs:
+            return []
+        order = sorted(range(len(jobs)), key=lambda i: jobs[i].weight, reverse=True)
+        results: List[Optional[LintJobResult]] = [None] * len(jobs)
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(jobs))) as pool:
+            futures = {pool.submit(self._run_job, jobs[i]): i for i in order}
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+                if on_result is not None:
+                    on_result(results[futures[future]])
+        return results
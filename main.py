@@ -1,11 +1,11 @@
 import subprocess
-import os
 import json
 import datetime as dt
-import requests
-import tempfile
 from typing import List, Dict
 
+from downloader import get_default_downloader
+from workspace import Workspace
+
 
 class MergeRequestReport:
     LINTERS_CONFIG = {
@@ -80,33 +80,31 @@ class MergeRequestReport:
         self.base_commit = base_commit
         self.head_commit = head_commit
 
-        # Кэш для загруженных временных файлов
-        self.temp_files = self._download_files()
-
-        self.linter_issues = self.run_linter()
-        self.antipatterns = self.detect_antipatterns()
-        self.additions, self.deletions = self.estimate_changes()
+        # Файлы скачиваются в рабочий каталог, который удаляется даже при ошибке
+        self.workspace = Workspace()
+        try:
+            self.temp_files = self._download_files()
 
-        # Очистка временных файлов
-        self._cleanup_temp_files()
+            self.linter_issues = self.run_linter()
+            self.antipatterns = self.detect_antipatterns()
+            self.additions, self.deletions = self.estimate_changes()
+        finally:
+            self.workspace.remove()
 
     def _filter_files_by_language(self, urls: List[str], language: str) -> List[str]:
         extensions = self.LINTERS_CONFIG[language]['file_extensions']
         return [url for url in urls if any(url.endswith(ext) for ext in extensions)]
 
     def _download_files(self) -> Dict[str, str]:
-        """Скачивает файлы по ссылке и сохраняет во временные файлы"""
+        """Параллельно скачивает файлы потоком прямо в рабочий каталог (байты как есть)"""
+        targets = {url: self.workspace.path_for(url) for url in self.file_urls}
         temp_files = {}
-        for url in self.file_urls:
-            try:
-                response = requests.get(url)
-                response.raise_for_status()
-                ext = os.path.splitext(url)[1]
-                with tempfile.NamedTemporaryFile(delete=False, suffix=ext, mode='w', encoding='utf-8') as tmp_file:
-                    tmp_file.write(response.text)
-                    temp_files[url] = tmp_file.name
-            except Exception as e:
-                print(f"Ошибка при загрузке {url}: {e}")
+        self.download_stats = get_default_downloader().fetch_all_to_files(targets)
+        for url, result in self.download_stats.items():
+            if not result.ok:
+                print(f"Ошибка при загрузке {url}: {result.error}")
+                continue
+            temp_files[url] = result.path
         return temp_files
 
     def run_linter(self) -> List[str]:
@@ -154,13 +152,6 @@ class MergeRequestReport:
         # Здесь пока просто нули
         return 0, 0
 
-    def _cleanup_temp_files(self):
-        for path in self.temp_files.values():
-            try:
-                os.remove(path)
-            except Exception as e:
-                print(f"Не удалось удалить временный файл {path}: {e}")
-
     def size_category(self) -> str:
         total_changes = self.additions + self.deletions
         if total_changes <= 50:
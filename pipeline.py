@@ -0,0 +1,141 @@
+import os
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from test_all import MergeRequestReport
+
+# Сколько отчётов одновременно может находиться на каждом этапе.
+# Сетевые этапы ждут ввода-вывода, поэтому им можно больше параллелизма;
+# этап линтинга сам занимает все ядра через LintScheduler
+DEFAULT_STAGE_LIMITS = {
+    'resolve_commits': 4,
+    'fetch_config': 4,
+    'download': 16,
+    'lint': max(1, (os.cpu_count() or 1) // 4),
+    'aggregate': 4,
+}
+
+
+@dataclass
+class PipelineResult:
+    index: int
+    report: Optional[MergeRequestReport] = None
+    error: Optional[BaseException] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class ReportPipeline:
+    """
+    Конвейер построения отчётов по множеству MR.
+
+    Каждый этап MergeRequestReport.STAGES выполняется в своём пуле потоков
+    со своим ограничением параллелизма, поэтому пока один отчёт линтится,
+    другие уже скачивают файлы или ждут конфиг. Одновременно в работе не
+    больше max_in_flight отчётов. Результат каждого отчёта - тот же
+    to_dict(), что и при синхронном создании MergeRequestReport.
+
+    on_event получает события хода анализа всех отчётов (см. progress.py)
+    с полем index - номером запроса во входе.
+    """
+
+    def __init__(
+            self,
+            stage_limits: Optional[Dict[str, int]] = None,
+            max_in_flight: int = 64,
+            on_event: Optional[Callable[[Dict], None]] = None
+    ):
+        self.stage_limits = {**DEFAULT_STAGE_LIMITS, **(stage_limits or {})}
+        self.max_in_flight = max_in_flight
+        self.on_event = on_event
+
+    def _events_for(self, index: int) -> Optional[Callable[[Dict], None]]:
+        if self.on_event is None:
+            return None
+        return lambda event: self.on_event({'index': index, **event})
+
+    def _advance(self, pools, report, index, stage_index, results, slots):
+        if stage_index == len(MergeRequestReport.STAGES):
+            results.put(PipelineResult(index, report=report))
+            slots.release()
+            return
+        stage = MergeRequestReport.STAGES[stage_index]
+        future = pools[stage].submit(getattr(report, stage))
+
+        def on_done(done: Future):
+            error = done.exception()
+            if error is not None:
+                report._cleanup_temp_files()
+                results.put(PipelineResult(index, error=error))
+                slots.release()
+            else:
+                self._advance(pools, report, index, stage_index + 1, results, slots)
+
+        future.add_done_callback(on_done)
+
+    def imap(self, report_kwargs: Iterable[Dict[str, Any]]) -> Iterator[PipelineResult]:
+        """
+        Принимает параметры MergeRequestReport для каждого MR и выдаёт
+        результаты по мере готовности (index - номер запроса во входе).
+
+        Если сам вход бросил исключение, уже начатые отчёты дорабатываются
+        и выдаются, а затем исключение пробрасывается вызывающему.
+        """
+        pools = {
+            stage: ThreadPoolExecutor(max_workers=self.stage_limits[stage], thread_name_prefix=stage)
+            for stage in MergeRequestReport.STAGES
+        }
+        results: queue.Queue = queue.Queue()
+        slots = threading.BoundedSemaphore(self.max_in_flight)
+        total = []
+        feed_errors: List[BaseException] = []
+
+        def feed():
+            count = 0
+            try:
+                for index, kwargs in enumerate(report_kwargs):
+                    slots.acquire()
+                    count += 1
+                    try:
+                        if self.on_event is not None:
+                            kwargs = {'on_event': self._events_for(index), **kwargs}
+                        report = MergeRequestReport(**kwargs, defer=True)
+                    except Exception as e:
+                        results.put(PipelineResult(index, error=e))
+                        slots.release()
+                        continue
+                    self._advance(pools, report, index, 0, results, slots)
+            except BaseException as e:
+                # Ошибка во входе (например, git в генераторе параметров): без сигнала
+                # о конце потребитель ждал бы результатов вечно
+                feed_errors.append(e)
+            finally:
+                total.append(count)
+                results.put(None)
+
+        feeder = threading.Thread(target=feed, daemon=True)
+        feeder.start()
+        try:
+            done = 0
+            fed_all = False
+            while not fed_all or done < total[0]:
+                item = results.get()
+                if item is None:
+                    fed_all = True
+                    continue
+                done += 1
+                yield item
+            if feed_errors:
+                raise feed_errors[0]
+        finally:
+            for pool in pools.values():
+                pool.shutdown(wait=False)
+
+    def run(self, report_kwargs: Iterable[Dict[str, Any]]) -> List[PipelineResult]:
+        """Обрабатывает все MR и возвращает результаты в порядке входа"""
+        return sorted(self.imap(report_kwargs), key=lambda result: result.index)
@@ -0,0 +1,41 @@
+"""
+События хода анализа в формате JSON Lines (одна JSON-строка на событие).
+
+Этапы отчёта вызывают колбэк on_event со словарём {"event": <тип>, ...}:
+    downloaded   {"url", "bytes", "cached"}   файл скачан или прочитан из git (cached - если известно)
+    skipped      {"url", "reason"}            файл не проверяется: binary или too_large
+    linted       {"url", "issues", "cached"}  файл проверен, issues - число проблем
+    diff_stats   {"additions", "deletions"}   готова статистика изменений
+    done         {"text"}                     отчёт готов (back.py --events, daemon.py)
+    error        {"error"}                    анализ завершился ошибкой
+"""
+import json
+import threading
+import time
+from typing import Callable, Dict, Optional, TextIO
+
+EventSink = Callable[[Dict], None]
+
+
+def emit(on_event: Optional[EventSink], event: str, **fields):
+    """Отправляет событие, если колбэк задан; ошибки колбэка не прерывают анализ"""
+    if on_event is None:
+        return
+    try:
+        on_event({'event': event, 'time': round(time.time(), 3), **fields})
+    except Exception as e:
+        print(f"Ошибка при отправке события {event}: {e}")
+
+
+class NdjsonWriter:
+    """Потокобезопасно пишет события в поток строками JSON и сразу сбрасывает буфер"""
+
+    def __init__(self, stream: TextIO):
+        self.stream = stream
+        self._lock = threading.Lock()
+
+    def __call__(self, event: Dict):
+        line = json.dumps(event, ensure_ascii=False) + '\n'
+        with self._lock:
+            self.stream.write(line)
+            self.stream.flush()
@@ -0,0 +1,259 @@
+"""
+Формирование отчёта из словаря MergeRequestReport.to_dict().
+
+Отчёт пишется в поток по частям: список проблем линтера перебирается
+один раз и не собирается в одну строку, поэтому память не растёт с
+числом проблем. Форматы: rpt (текст), json, jsonl и csv.
+
+Модуль не зависит от сетевого стека и линтеров, поэтому его можно
+импортировать быстро (back.py, daemon.py).
+"""
+import csv
+import datetime as dt
+import io
+import itertools
+import json
+import os
+import re
+from typing import Dict, Iterable, Iterator, Optional, TextIO, Tuple
+
+FORMATS = ('rpt', 'json', 'jsonl', 'csv')
+
+# Поля отчёта, кроме списка проблем, в порядке to_dict()
+SUMMARY_FIELDS = ('Period', 'Language', 'Size', 'Score')
+TAIL_FIELDS = ('Antipatterns', 'Positives', 'Additions', 'Deletions')
+
+# "<файл>:<строка>:<столбец>: <код> <сообщение>"; в back.py после файла стоит пробел
+_ISSUE_RE = re.compile(r'^(?P<file>.+?):\s?(?P<line>\d+):(?P<col>\d+):\s(?P<code>\S+)\s?(?P<message>.*)$')
+
+SEPARATOR = '=' * 40
+
+
+def issue_fields(issue) -> Tuple[str, int, int, str, str]:
+    """(файл, строка, столбец, код, сообщение) для LintIssue или строки проблемы"""
+    if hasattr(issue, 'code'):
+        return issue.file, issue.line, issue.col, issue.code, issue.message
+    match = _ISSUE_RE.match(str(issue))
+    if match is None:
+        return '', 0, 0, '', str(issue)
+    return match['file'], int(match['line']), int(match['col']), match['code'], match['message']
+
+
+def limit_issues(issues: Iterable, max_per_file: Optional[int]) -> Iterator[Tuple[str, list, int]]:
+    """
+    Выдаёт (файл, проблемы, сколько отброшено) для каждой подряд идущей
+    группы проблем одного файла. Отчёты перечисляют проблемы по файлам,
+    поэтому группа - это все проблемы файла. В памяти держится не больше
+    max_per_file проблем.
+    """
+    for file, group in itertools.groupby(issues, key=lambda issue: issue_fields(issue)[0]):
+        if max_per_file is None:
+            yield file, group, 0
+            continue
+        kept = list(itertools.islice(group, max_per_file))
+        yield file, kept, sum(1 for _ in group)
+
+
+def group_by_file_issues(issues: Iterable) -> list:
+    """
+    Проблемы, переставленные так, чтобы проблемы одного файла шли подряд
+    (файлы - в порядке первого появления, как IssueTable.by_file). Нужно
+    для вывода по файлам: иначе файл с несмежными проблемами и проблемы
+    без файла дали бы несколько групп с одним именем.
+    """
+    grouped: Dict[str, list] = {}
+    for issue in issues:
+        grouped.setdefault(issue_fields(issue)[0], []).append(issue)
+    return list(itertools.chain.from_iterable(grouped.values()))
+
+
+def detect_format(output_file: str) -> str:
+    """Формат по расширению файла; неизвестное расширение - rpt"""
+    ext = os.path.splitext(output_file)[1].lstrip('.').lower()
+    return ext if ext in FORMATS else 'rpt'
+
+
+def _write_rpt(input_data, out: TextIO, max_issues_per_file: Optional[int], group_by_file: bool):
+    out.write(f"""Отчёт о качестве кода
+{SEPARATOR}
+
+Период анализа: {input_data.get('Period', 'N/A')}
+Язык программирования: {input_data.get('Language', 'N/A').capitalize()}
+Размер проекта: {input_data.get('Size', 'N/A')}
+Общая оценка: {input_data.get('Score', 0)}/10
+
+{SEPARATOR}
+Проблемы линтера:
+""")
+    written = False
+    for file, issues, omitted in limit_issues(input_data.get('Linter Issues', []), max_issues_per_file):
+        if group_by_file and file:
+            out.write(f"  {file}:\n")
+        for issue in issues:
+            written = True
+            if group_by_file and file:
+                _, line, col, code, message = issue_fields(issue)
+                out.write(f"    • {line}:{col}: {code} {message}\n")
+            else:
+                out.write(f"  • {issue}\n")
+        if omitted:
+            written = True
+            out.write(f"  … и ещё {omitted} проблем в {file or 'отчёте'}\n")
+    if not written:
+        out.write("  Нет проблем\n")
+
+    out.write(f"""
+{SEPARATOR}
+Антипаттерны:
+{format_list_items(input_data.get('Antipatterns', []))}
+
+{SEPARATOR}
+Положительные аспекты:
+{format_list_items(input_data.get('Positives', []))}
+
+{SEPARATOR}
+Статистика изменений:
+Добавлено строк: {input_data.get('Additions', 0)}
+Удалено строк: {input_data.get('Deletions', 0)}
+
+{SEPARATOR}
+Отчёт сформирован: {dt.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+""")
+
+
+def _write_json(input_data, out: TextIO, max_issues_per_file: Optional[int], group_by_file: bool):
+    """JSON с теми же ключами, что to_dict(); массив проблем пишется поэлементно"""
+    out.write('{')
+    for name in SUMMARY_FIELDS:
+        out.write(f"{json.dumps(name)}: {json.dumps(input_data.get(name), ensure_ascii=False)}, ")
+    out.write('"Linter Issues": ' + ('{' if group_by_file else '['))
+    omitted_by_file: Dict[str, int] = {}
+    first_issue = first_file = True
+    for file, issues, omitted in limit_issues(input_data.get('Linter Issues', []), max_issues_per_file):
+        if group_by_file:
+            out.write(('' if first_file else ', ') + json.dumps(file, ensure_ascii=False) + ': [')
+            first_file, first_issue = False, True
+        for issue in issues:
+            out.write(('' if first_issue else ', ') + json.dumps(str(issue), ensure_ascii=False))
+            first_issue = False
+        if group_by_file:
+            out.write(']')
+        if omitted:
+            omitted_by_file[file] = omitted_by_file.get(file, 0) + omitted
+    out.write('}' if group_by_file else ']')
+    if omitted_by_file:
+        out.write(f', "Omitted Issues": {json.dumps(omitted_by_file, ensure_ascii=False)}')
+    for name in TAIL_FIELDS:
+        out.write(f", {json.dumps(name)}: {json.dumps(input_data.get(name), ensure_ascii=False)}")
+    out.write('}\n')
+
+
+def _write_jsonl(input_data, out: TextIO, max_issues_per_file: Optional[int], group_by_file: bool):
+    """Первая строка - сводка без проблем, затем по строке на проблему и на отброшенные"""
+    summary = {name: input_data.get(name) for name in SUMMARY_FIELDS + TAIL_FIELDS}
+    out.write(json.dumps({'type': 'summary', **summary}, ensure_ascii=False) + '\n')
+    for file, issues, omitted in limit_issues(input_data.get('Linter Issues', []), max_issues_per_file):
+        for issue in issues:
+            _, line, col, code, message = issue_fields(issue)
+            record = {'type': 'issue', 'file': file, 'line': line, 'col': col, 'code': code, 'message': message}
+            out.write(json.dumps(record, ensure_ascii=False) + '\n')
+        if omitted:
+            out.write(json.dumps({'type': 'omitted', 'file': file, 'count': omitted}, ensure_ascii=False) + '\n')
+
+
+def _write_csv(input_data, out: TextIO, max_issues_per_file: Optional[int], group_by_file: bool):
+    """
+    Только проблемы линтера, по строке на проблему. Отброшенные по
+    max_issues_per_file проблемы файла - строка с кодом omitted и их
+    числом в message (как записи omitted в jsonl).
+    """
+    writer = csv.writer(out)
+    writer.writerow(['file', 'line', 'col', 'code', 'message'])
+    for file, issues, omitted in limit_issues(input_data.get('Linter Issues', []), max_issues_per_file):
+        for issue in issues:
+            writer.writerow(issue_fields(issue))
+        if omitted:
+            writer.writerow([file, '', '', 'omitted', omitted])
+
+
+WRITERS = {
+    'rpt': _write_rpt,
+    'json': _write_json,
+    'jsonl': _write_jsonl,
+    'csv': _write_csv,
+}
+
+
+def write_report(
+        input_data,
+        out: TextIO,
+        fmt: str = 'rpt',
+        max_issues_per_file: Optional[int] = None,
+        group_by_file: bool = False
+):
+    """
+    Пишет отчёт в поток out по частям.
+
+    :param input_data: Словарь с входными данными; 'Linter Issues' может быть итератором
+    :param fmt: rpt, json, jsonl или csv
+    :param max_issues_per_file: Сколько проблем на файл выводить, остальные только считаются
+    :param group_by_file: Выводить проблемы под заголовком файла (rpt) или объектом {файл: [...]} (json)
+    """
+    if fmt not in WRITERS:
+        raise ValueError(f"Неизвестный формат отчёта: {fmt}")
+    if group_by_file:
+        # Группировка требует всех проблем сразу, без неё отчёт пишется потоком
+        input_data = {**input_data, 'Linter Issues': group_by_file_issues(input_data.get('Linter Issues', []))}
+    WRITERS[fmt](input_data, out, max_issues_per_file, group_by_file)
+
+
+def render_report(input_data, fmt: str = 'rpt', **options) -> str:
+    """
+    Формирует текст отчёта (по умолчанию в формате .rpt) из входных данных JSON.
+
+    :param input_data: Словарь с входными данными
+    :return: Текст отчёта
+    """
+    buffer = io.StringIO()
+    write_report(input_data, buffer, fmt, **options)
+    return buffer.getvalue()
+
+
+def generate_report(
+        input_data,
+        output_file,
+        fmt: Optional[str] = None,
+        max_issues_per_file: Optional[int] = None,
+        group_by_file: bool = False
+):
+    """
+    Генерирует отчёт из входных данных JSON и пишет его в файл по мере формирования.
+
+    :param input_data: Словарь с входными данными
+    :param output_file: Имя выходного файла (.rpt, .json, .jsonl или .csv)
+    :param fmt: Формат отчёта; по умолчанию определяется по расширению файла
+    """
+    fmt = fmt or detect_format(output_file)
+    try:
+        # csv.writer сам пишет переводы строк
+        with open(output_file, 'w', encoding='utf-8', newline='' if fmt == 'csv' else None) as f:
+            write_report(input_data, f, fmt, max_issues_per_file, group_by_file)
+
+        print(f"Отчёт успешно сформирован и сохранён в файл: {output_file}")
+
+    except Exception as e:
+        print(f"Ошибка при формировании отчёта: {str(e)}")
+
+
+def format_linter_issues(issues):
+    """Форматирует список проблем линтера для отчёта."""
+    if not issues:
+        return "  Нет проблем"
+    return '\n'.join(f"  • {issue}" for issue in issues)
+
+
+def format_list_items(items):
+    """Форматирует список элементов для отчёта."""
+    if not items:
+        return "  Нет данных"
+    return '\n'.join(f"  • {item}" for item in items)
@@ -0,0 +1,201 @@
+"""
+Оценка качества отчёта по статистике проблем.
+
+Каждый код линтера получает вес по уровню серьёзности (issue_table.severity)
+или явный вес из code_weights, антипаттерн - antipattern_weight. Сумма
+весов делится на число изменённых строк (additions + deletions, не меньше
+min_lines), и плотность проблем на 100 строк переводится в оценку 1..10:
+
+    score = 1 + 9 * exp(-density / scale)
+
+Поэтому оценка не упирается в 1 на крупных MR и не зависит от того,
+сколько строк вокруг проблем не менялось.
+
+score() считает один отчёт на чистом Python, score_many() - тысячи
+отчётов сразу массивами NumPy (np.bincount по кодам всех отчётов), если
+numpy установлен, иначе тем же циклом. Счётчики можно один раз свернуть
+в IssueStats и оценивать их score_stats() с разными весами.
+
+Для оценки нужны только счётчики кодов, объём изменений и число
+антипаттернов, поэтому при смене весов сохранённые отчёты пересчитываются
+без повторного линтинга (developer_profile.py --rescore).
+"""
+import json
+import math
+from itertools import chain
+from typing import TYPE_CHECKING, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from issue_table import severity
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Вес проблемы по уровню серьёзности
+SEVERITY_WEIGHTS: Dict[str, float] = {
+    'error': 3.0,
+    'warning': 1.0,
+    'convention': 0.3,
+}
+
+# Категории размера: S - до 50 изменённых строк включительно, M - до 300, L - больше.
+# Меток всегда на одну больше, чем порогов
+SIZE_THRESHOLDS: Tuple[int, ...] = (50, 300)
+SIZE_LABELS: Tuple[str, ...] = ('S', 'M', 'L')
+
+
+class IssueStats:
+    """
+    Счётчики кодов многих отчётов в колоночном виде (нужен numpy).
+
+    Строится один раз: коды хранятся словарём, а пары (отчёт, код, число)
+    - тремя плоскими массивами, поэтому оценка с любыми весами - это
+    несколько операций над массивами без обхода словарей.
+    """
+
+    def __init__(self, codes: Sequence[Mapping[str, int]], changed: Sequence[int], antipatterns: Sequence[int]):
+        import numpy as np
+
+        vocabulary: Dict[str, int] = {}
+        keys = list(chain.from_iterable(codes))
+        self.code_ids = np.fromiter(
+            (vocabulary.setdefault(code, len(vocabulary)) for code in keys), dtype=np.intp, count=len(keys)
+        )
+        self.codes: List[str] = list(vocabulary)
+        self.counts = np.fromiter(
+            chain.from_iterable(report_codes.values() for report_codes in codes), dtype=float, count=len(keys)
+        )
+        self.report_ids = np.repeat(
+            np.arange(len(codes)), np.fromiter(map(len, codes), dtype=np.intp, count=len(codes))
+        )
+        self.changed = np.asarray(changed, dtype=float)
+        self.antipatterns = np.asarray(antipatterns, dtype=float)
+
+    def __len__(self) -> int:
+        return len(self.changed)
+
+
+def is_available() -> bool:
+    """Есть ли numpy для пакетной оценки"""
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class ScoringModel:
+    def __init__(
+            self,
+            severity_weights: Optional[Mapping[str, float]] = None,
+            code_weights: Optional[Mapping[str, float]] = None,
+            antipattern_weight: float = 2.0,
+            scale: float = 10.0,
+            min_lines: int = 50,
+            size_thresholds: Sequence[int] = SIZE_THRESHOLDS,
+            size_labels: Sequence[str] = SIZE_LABELS
+    ):
+        if len(size_labels) != len(size_thresholds) + 1:
+            raise ValueError(
+                f"Меток размера должно быть на одну больше, чем порогов: "
+                f"{len(size_thresholds)} порогов, {len(size_labels)} меток"
+            )
+        self.severity_weights = dict(SEVERITY_WEIGHTS if severity_weights is None else severity_weights)
+        self.code_weights = dict(code_weights or {})
+        self.antipattern_weight = antipattern_weight
+        self.scale = scale
+        self.min_lines = max(1, min_lines)
+        self.size_thresholds = tuple(size_thresholds)
+        self.size_labels = tuple(size_labels)
+        self._weights: Dict[str, float] = {}
+
+    @classmethod
+    def from_json(cls, path: str) -> 'ScoringModel':
+        """
+        Модель из JSON-файла, все ключи необязательны:
+        {"severity": {"error": 5}, "codes": {"E501": 0.1}, "antipattern": 2, "scale": 10, "min_lines": 50,
+         "size_thresholds": [50, 300], "size_labels": ["S", "M", "L"]}
+
+        Если задаёт size_thresholds, то и size_labels (на одну метку больше),
+        кроме случая двух порогов с метками по умолчанию.
+        """
+        with open(path, encoding='utf-8') as f:
+            config = json.load(f)
+        severity_weights = {**SEVERITY_WEIGHTS, **config.get('severity', {})}
+        return cls(
+            severity_weights=severity_weights,
+            code_weights=config.get('codes'),
+            antipattern_weight=config.get('antipattern', 2.0),
+            scale=config.get('scale', 10.0),
+            min_lines=config.get('min_lines', 50),
+            size_thresholds=config.get('size_thresholds', SIZE_THRESHOLDS),
+            size_labels=config.get('size_labels', SIZE_LABELS),
+        )
+
+    def weight(self, code: str) -> float:
+        """Вес одной проблемы с кодом code"""
+        weight = self._weights.get(code)
+        if weight is None:
+            weight = self.code_weights.get(code)
+            if weight is None:
+                weight = self.severity_weights.get(severity(code), 1.0)
+            self._weights[code] = weight
+        return weight
+
+    def _from_weighted(self, weighted: float, changed: int) -> float:
+        density = weighted * 100 / max(changed, self.min_lines)
+        return 1 + 9 * math.exp(-density / self.scale)
+
+    def score(self, codes: Mapping[str, int], changed: int, antipatterns: int = 0) -> float:
+        """Оценка 1..10 одного отчёта по {код: число проблем}"""
+        weighted = sum(count * self.weight(code) for code, count in codes.items())
+        return self._from_weighted(weighted + antipatterns * self.antipattern_weight, changed)
+
+    def score_stats(self, stats: 'IssueStats') -> 'np.ndarray':
+        """Оценки всех отчётов IssueStats одним проходом по массивам"""
+        import numpy as np
+
+        weights = np.fromiter((self.weight(code) for code in stats.codes), dtype=float, count=len(stats.codes))
+        weighted = np.bincount(stats.report_ids, weights=stats.counts * weights[stats.code_ids], minlength=len(stats))
+        weighted += stats.antipatterns * self.antipattern_weight
+        density = weighted * 100 / np.maximum(stats.changed, self.min_lines)
+        return 1 + 9 * np.exp(-density / self.scale)
+
+    def score_many(
+            self,
+            codes: Sequence[Mapping[str, int]],
+            changed: Sequence[int],
+            antipatterns: Sequence[int]
+    ) -> List[float]:
+        """Оценки многих отчётов сразу; списки выровнены по отчётам"""
+        if not is_available():
+            return [self.score(c, n, a) for c, n, a in zip(codes, changed, antipatterns)]
+        return self.score_stats(IssueStats(codes, changed, antipatterns)).tolist()
+
+    def size_category(self, changed: int) -> str:
+        for threshold, label in zip(self.size_thresholds, self.size_labels):
+            if changed <= threshold:
+                return label
+        return self.size_labels[-1]
+
+    def size_categories(self, changed: Sequence[int]) -> List[str]:
+        if not is_available():
+            return [self.size_category(n) for n in changed]
+        import numpy as np
+
+        indices = np.searchsorted(np.asarray(self.size_thresholds), np.asarray(changed), side='left')
+        return [self.size_labels[i] for i in indices.tolist()]
+
+
+def to_grade(score: float) -> int:
+    """Целая оценка 1..10 для отчёта и хранилища"""
+    return min(10, max(1, int(round(score))))
+
+
+_default_model = None
+
+
+def get_default_model() -> ScoringModel:
+    global _default_model
+    if _default_model is None:
+        _default_model = ScoringModel()
+    return _default_model
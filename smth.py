@@ -1,5 +1,6 @@
 import datetime as dt
-from test_all import MergeRequestReport, generate_report
+from report import generate_report
+from test_all import MergeRequestReport
 
 if __name__ == '__main__':
     # ▶️ Пример использования
@@ -1,35 +1,37 @@
 import json
 import os
-import tempfile
-import requests
 import subprocess
-from typing import List, Dict, Optional, Tuple
+from typing import Callable, List, Dict, Optional, Tuple
 import datetime as dt
 
+from downloader import Downloader, DownloadResult, decode_source, get_default_downloader, is_binary
+from linters import (
+    LintIssue, LintJob, LinterError, LintScheduler, find_antipatterns_by_codes, get_output_format, parse_flake8
+)
+import flake8_engine
+from config_cache import LinterConfigCache, get_default_config_cache
+from gitrepo import BlobReader, get_commit_index, github_raw_url, github_url_to_path, in_ranges
+from lint_cache import (
+    LINTER_CONFIG_FILES, LintResultCache, blob_sha, blob_sha_file, get_default_lint_cache, get_fingerprint, restore_issues, strip_issues
+)
+from instrumentation import Recorder, get_default_recorder
+from issue_table import IssueTable
+from workspace import Workspace
+from deepseek import DeepSeekAPI, get_default_deepseek  # noqa: F401
+from progress import emit
+from scoring import ScoringModel, get_default_model, to_grade
+from report import format_linter_issues, format_list_items, generate_report, render_report  # noqa: F401
 
-class DeepSeekAPI:
-    def __init__(self):
-        #self.api_key = "sk-c036153a3e834d83b96d8988b4b6b66a"
-        self.api_key = "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"
-        #self.api_key = "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"
-        self.base_url = "https://openrouter.ai/api/v1/chat"
 
-    def generate(self, model: str, prompt: str, max_tokens: int, temperature: float):
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
-        data = {
-            "model": model,
-            "prompt": prompt,
-            "max_tokens": max_tokens,
-            "temperature": temperature
-        }
-        response = requests.post(f"{self.base_url}/completions", json=data, headers=headers)
-        return response.json()
+class MergeRequestReport:
+    # Модель и версия промпта для генерации конфига; входят в ключ кэша,
+    # поэтому при изменении промпта версию нужно увеличить
+    CONFIG_MODEL = "deepseek/deepseek-chat:free"
+    CONFIG_PROMPT_VERSION = "1"
 
+    # Этапы построения отчёта в порядке выполнения (см. pipeline.ReportPipeline)
+    STAGES = ('resolve_commits', 'fetch_config', 'download', 'lint', 'aggregate')
 
-class MergeRequestReport:
     # Базовые настройки для линтеров (можно использовать как fallback)
     BASE_LINTERS_CONFIG = {
         'python': {
@@ -47,12 +49,10 @@ class MergeRequestReport:
         'java': {
             'command': 'java -jar checkstyle-10.12.4-all.jar -c google_checks.xml',
             'file_extensions': ['.java'],
-            'output_parser': lambda x: x.split('\n')[1:-1]
         },
         'php': {
             'command': 'phpcs',
             'file_extensions': ['.php'],
-            'output_parser': lambda x: [line.strip() for line in x.split('\n') if line.strip()]
         }
     }
 
@@ -62,55 +62,134 @@ class MergeRequestReport:
             merged_at: dt.datetime,
             github_file_urls: List[str],
             positives: List[str],
-            language: str = 'python'
+            language: str = 'python',
+            downloader: Optional[Downloader] = None,
+            batch_lint: bool = True,
+            inprocess_lint: bool = True,
+            config_cache: Optional[LinterConfigCache] = None,
+            defer: bool = False,
+            source: str = 'http',
+            repo_path: Optional[str] = None,
+            incremental: bool = False,
+            lint_cache: Optional[LintResultCache] = None,
+            on_event: Optional[Callable[[Dict], None]] = None,
+            base_commit: Optional[str] = None,
+            head_commit: Optional[str] = None,
+            recorder: Optional[Recorder] = None,
+            scoring_model: Optional[ScoringModel] = None
     ):
+        """
+        Если defer=True, конструктор только сохраняет параметры, а этапы
+        из STAGES вызывает снаружи конвейер (pipeline.ReportPipeline).
+
+        source='git' берёт содержимое файлов из локального репозитория
+        repo_path на head_commit вместо скачивания с GitHub.
+
+        incremental=True линтит только файлы, изменённые между base_commit
+        и head_commit, и оставляет только проблемы в изменённых строках.
+
+        on_event получает события хода анализа (см. progress.py) по мере
+        скачивания и проверки файлов.
+
+        base_commit и head_commit, если известны, используются вместо
+        поиска коммитов по created_at и merged_at.
+
+        recorder собирает время, CPU и объёмы по этапам (см. instrumentation.py);
+        по умолчанию - свой сборщик, дублирующий замеры в общий сборщик процесса.
+
+        scoring_model задаёт веса проблем для оценки и размера (см. scoring.py).
+        """
+        if source not in ('http', 'git'):
+            raise ValueError(f"Неизвестный источник файлов: {source}")
         self.created_at = created_at
         self.merged_at = merged_at
         self.language = language.lower()
         self.positives = positives
-        self.repo_path = os.path.abspath("") # Сохраняем абсолютный путь
-
-        # Получаем коммиты по датам
-        self.base_commit = self._get_commit_by_date(created_at)
-        self.head_commit = self._get_commit_by_date(merged_at)
-
-        # Инициализация DeepSeek
-        self.deepseek = DeepSeekAPI()
+        self.github_file_urls = github_file_urls
+        self.repo_path = os.path.abspath(repo_path or "") # Сохраняем абсолютный путь
+        self.source = source
+        self.downloader = downloader or get_default_downloader()
+        self.download_stats: Dict[str, DownloadResult] = {}
+        self.batch_lint = batch_lint
+        self.lint_scheduler = LintScheduler()
+        self.issue_table = IssueTable()
+        self.sources: Dict[str, str] = {}
+        self.config_cache = config_cache or get_default_config_cache()
+        self.inprocess_lint = inprocess_lint
+        self.temp_files: Dict[str, str] = {}
+        self.workspace: Optional[Workspace] = None
+        self.incremental = incremental
+        self.changed_lines: Optional[Dict[str, List[Tuple[int, int]]]] = None
+        self.lint_cache = lint_cache or get_default_lint_cache()
+        self.blob_shas: Dict[str, str] = {}
+        self.cached_issues: Dict[str, List[LintIssue]] = {}
+        self.on_event = on_event
+        self.base_commit = base_commit
+        self.head_commit = head_commit
+        self.recorder = recorder or Recorder(parent=get_default_recorder())
+        self.scoring_model = scoring_model or get_default_model()
+
+        if not defer:
+            try:
+                for stage in self.STAGES:
+                    getattr(self, stage)()
+            except BaseException:
+                self._cleanup_temp_files()
+                raise
+
+    def resolve_commits(self):
+        """Этап 1: получаем коммиты по датам (если они не заданы явно)"""
+        with self.recorder.span('git_lookup'):
+            if not self.base_commit:
+                self.base_commit = self._get_commit_by_date(self.created_at)
+            if not self.head_commit:
+                self.head_commit = self._get_commit_by_date(self.merged_at)
+
+    def fetch_config(self):
+        """Этап 2: конфиг линтера и фильтрация файлов по языку"""
+        # Общий клиент DeepSeek: пул соединений, таймауты и ограничение частоты на весь процесс
+        self.deepseek = get_default_deepseek()
 
         # Получаем конфиг линтера
-        self.linter_config = self._get_linter_config()
-
-        # Фильтрация и обработка файлов
-        self.file_urls = self._filter_files_by_language(github_file_urls, language)
-        self.temp_files = self._download_files()
-        self.linter_issues = self.run_linter()
-        self.antipatterns = self.detect_antipatterns()
-        self.additions, self.deletions = self.estimate_changes()
-        self._cleanup_temp_files()
+        with self.recorder.span('llm_config', language=self.language):
+            self.linter_config = self._get_linter_config()
+        self.inprocess_lint = self.inprocess_lint and self._can_lint_inprocess()
+        self.file_urls = self._filter_files_by_language(self.github_file_urls, self.language)
+        if self.incremental:
+            self._select_changed_files()
+
+    def download(self):
+        """Этап 3: скачивание файлов"""
+        with self.recorder.span('download', source=self.source) as span:
+            self.temp_files = self._download_files()
+            span['count'] = len(self.blob_shas)
+            span['bytes'] = sum(result.bytes for result in self.download_stats.values() if result.ok)
+
+    def lint(self):
+        """Этап 4: запуск линтера"""
+        with self.recorder.span('lint', inprocess=bool(self.inprocess_lint)) as span:
+            self.linter_issues = self.run_linter()
+            span['count'] = len(self.issue_table)
+
+    def aggregate(self):
+        """Этап 5: антипаттерны, статистика изменений и очистка"""
+        try:
+            with self.recorder.span('antipatterns'):
+                self.antipatterns = self.detect_antipatterns()
+            with self.recorder.span('diff'):
+                self.additions, self.deletions = self.estimate_changes()
+            emit(self.on_event, 'diff_stats', additions=self.additions, deletions=self.deletions)
+        finally:
+            self._cleanup_temp_files()
 
     def _get_linter_config(self) -> Dict:
-        """Получаем конфигурацию линтера через DeepSeek API"""
+        """Получаем конфигурацию линтера через DeepSeek API (с кэшем на диске)"""
         if not self.deepseek:
             return self.BASE_LINTERS_CONFIG.get(self.language, {})
 
         try:
-            prompt = (
-                f"Provide configuration for {self.language} linter including:\n"
-                "1. Command to run\n"
-                "2. File extensions\n"
-                "3. Common antipatterns with codes and Russian descriptions\n"
-                "Return only valid JSON with first 20 antipatterns without any additional text."
-            )
-
-            response = self.deepseek.generate(
-                model="deepseek/deepseek-chat:free",
-                prompt=prompt,
-                max_tokens=2500,
-                temperature=0.3
-            )
-
-            # Парсинг ответа (может потребоваться адаптация под формат ответа DeepSeek)
-            config = self._parse_deepseek_response(response)
+            key = (self.language, self.CONFIG_PROMPT_VERSION, self.CONFIG_MODEL)
+            config = self.config_cache.get(key, self._fetch_deepseek_config)
 
             # Объединяем с базовой конфигурацией
             base_config = self.BASE_LINTERS_CONFIG.get(self.language, {})
@@ -120,6 +199,31 @@ class MergeRequestReport:
             print(f"Error getting linter config from DeepSeek: {e}")
             return self.BASE_LINTERS_CONFIG.get(self.language, {})
 
+    def _fetch_deepseek_config(self) -> Dict:
+        """Запрашивает конфиг у DeepSeek; неудачный ответ не попадает в кэш"""
+        prompt = (
+            f"Provide configuration for {self.language} linter including:\n"
+            "1. Command to run\n"
+            "2. File extensions\n"
+            "3. Common antipatterns with codes and Russian descriptions\n"
+            "Return only valid JSON with first 20 antipatterns without any additional text."
+        )
+
+        # Отдельный замер запроса к LLM: llm_config без него - попадание в кэш
+        with self.recorder.span('llm_request', model=self.CONFIG_MODEL):
+            response = self.deepseek.generate(
+                model=self.CONFIG_MODEL,
+                prompt=prompt,
+                max_tokens=2500,
+                temperature=0.3
+            )
+
+        # Парсинг ответа (может потребоваться адаптация под формат ответа DeepSeek)
+        config = self._parse_deepseek_response(response)
+        if not config.get('antipatterns'):
+            raise ValueError("DeepSeek не вернул антипаттерны")
+        return config
+
     def _parse_deepseek_response(self, response: dict) -> dict:
         """Парсит ответ от DeepSeek API"""
         # Default values if parsing fails
@@ -183,97 +287,267 @@ class MergeRequestReport:
         extensions = self.linter_config.get('file_extensions', [])
         return [url for url in urls if any(url.endswith(ext) for ext in extensions)]
 
+    def _select_changed_files(self):
+        """Оставляет только файлы, изменённые между base_commit и head_commit"""
+        if not self.base_commit or not self.head_commit:
+            print("Инкрементальный режим недоступен: не найдены коммиты, линтим все файлы")
+            return
+        try:
+            self.changed_lines = get_commit_index(self.repo_path).changed_lines(self.base_commit, self.head_commit)
+        except Exception as e:
+            print(f"Не удалось получить изменения между коммитами: {e}")
+            return
+        # Ссылки, по которым нельзя определить путь в репозитории, оставляем
+        self.file_urls = [
+            url for url in self.file_urls
+            if github_url_to_path(url) is None or github_url_to_path(url) in self.changed_lines
+        ]
+
+    def _lint_fingerprint(self) -> str:
+        """Отпечаток линтера (команда, версия, бинарник, конфиг) для ключа кэша результатов"""
+        if getattr(self, '_fingerprint', None) is None:
+            command, _ = get_output_format(self.language, self.linter_config.get('command', ''))
+            self._fingerprint = get_fingerprint(self.language, command, self.lint_cache)
+        return self._fingerprint
+
+    def _can_lint_inprocess(self) -> bool:
+        """Python-файлы можно проверить flake8 прямо в процессе, если он установлен"""
+        command = (self.linter_config or {}).get('command', '').split()
+        return self.language == 'python' and command[:1] == ['flake8'] and flake8_engine.is_available()
+
+    def _read_git_blobs(self) -> Dict[str, bytes]:
+        """Читает файлы из локального репозитория на head_commit без обращения к сети"""
+        if not self.head_commit:
+            print("Не найден коммит для чтения файлов из репозитория")
+            return {}
+        paths = {url: github_url_to_path(url) for url in self.file_urls}
+        with self.recorder.span('git_read') as span:
+            blobs = BlobReader(self.repo_path).read(
+                self.head_commit, [path for path in paths.values() if path]
+            )
+            span['count'] = len(blobs)
+            span['bytes'] = sum(len(blob) for blob in blobs.values() if blob)
+        contents = {}
+        for url, path in paths.items():
+            blob = blobs.get(path) if path else None
+            if blob is None:
+                print(f"Файл {url} не найден в репозитории на коммите {self.head_commit}")
+                continue
+            if is_binary(blob) or len(blob) > self.downloader.max_file_size:
+                binary = is_binary(blob)
+                print(f"Пропущен {url}: {'двоичный файл' if binary else 'файл больше предела'}")
+                emit(self.on_event, 'skipped', url=url, reason='binary' if binary else 'too_large')
+                continue
+            contents[url] = blob
+            emit(self.on_event, 'downloaded', url=url, bytes=len(blob), cached=False)
+        return contents
+
+    def _download_to_workspace(self) -> Dict[str, str]:
+        """
+        Скачивает файлы потоком прямо в рабочий каталог (байты как есть).
+        Ссылки github.com/.../blob/... качаются по сырым ссылкам, чтобы файлы
+        по ссылке на коммит отдавались из кэша без сети.
+        """
+        raw_urls = {url: github_raw_url(url) for url in self.file_urls}
+        targets = {raw_urls[url]: self.workspace.path_for(url) for url in self.file_urls}
+        results = self.downloader.fetch_all_to_files(targets)
+        self.download_stats = {url: results[raw_url] for url, raw_url in raw_urls.items()}
+        paths = {}
+        for url, result in self.download_stats.items():
+            if result.skipped:
+                print(f"Пропущен {url}: {result.error}")
+                emit(self.on_event, 'skipped', url=url, reason=result.skipped)
+                continue
+            if not result.ok:
+                print(f"Ошибка при загрузке {url}: {result.error}")
+                continue
+            paths[url] = result.path
+            self.recorder.record('download_file', result.latency, url=url, bytes=result.bytes,
+                                 cached=result.cached, attempts=result.attempts)
+            emit(self.on_event, 'downloaded', url=url, bytes=result.bytes, cached=result.cached)
+        return paths
+
     def _download_files(self) -> Dict[str, str]:
-        """Скачивает файлы по ссылке и сохраняет во временные файлы"""
+        """
+        Параллельно скачивает файлы (или читает их из git) в рабочий
+        каталог отчёта (workspace.py) под их путями в репозитории, без
+        перекодирования. При проверке в процессе исходники остаются в
+        памяти (self.sources). Файлы, результат линтинга которых уже есть
+        в кэше, не сохраняются.
+        """
+        fingerprint = self._lint_fingerprint()
+        if self.workspace is None:
+            self.workspace = Workspace()
+            self.workspace.copy_configs(LINTER_CONFIG_FILES)
+
+        def is_cached(url: str) -> bool:
+            cached = self.lint_cache.get(self.blob_shas[url], fingerprint)
+            if cached is not None:
+                self.cached_issues[url] = restore_issues(cached, url)
+                self._emit_linted(url, self.cached_issues[url], cached=True)
+            return cached is not None
+
         temp_files = {}
-        for url in self.file_urls:
+        if self.source == 'git':
+            for url, blob in self._read_git_blobs().items():
+                self.blob_shas[url] = blob_sha(blob)
+                if is_cached(url):
+                    continue
+                if self.inprocess_lint:
+                    self.sources[url], _ = decode_source(blob)
+                    continue
+                try:
+                    temp_files[url] = self.workspace.write(url, blob)
+                except Exception as e:
+                    print(f"Ошибка при сохранении {url}: {e}")
+            return temp_files
+
+        for url, path in self._download_to_workspace().items():
+            self.blob_shas[url] = blob_sha_file(path)
+            if is_cached(url):
+                os.remove(path)
+            elif self.inprocess_lint:
+                with open(path, 'rb') as f:
+                    self.sources[url], _ = decode_source(f.read(), self.download_stats[url].encoding)
+                os.remove(path)
+            else:
+                temp_files[url] = path
+        return temp_files
+
+    def _run_inprocess_linter(self) -> Dict[str, List[LintIssue]]:
+        """flake8 в процессе: строки те же, что у CLI, но с url вместо пути к временному файлу"""
+        engine = flake8_engine.get_engine(self.linter_config['command'].split()[1:])
+        issues_by_url = {}
+        for url, source in self.sources.items():
             try:
-                response = requests.get(url)
-                response.raise_for_status()
-                ext = os.path.splitext(url)[1]
-                with tempfile.NamedTemporaryFile(
-                        delete=False,
-                        suffix=ext,
-                        mode='w',
-                        encoding='utf-8'
-                ) as tmp_file:
-                    tmp_file.write(response.text)
-                    temp_files[url] = tmp_file.name
+                with self.recorder.span('lint_file', url=url, bytes=len(source.encode('utf-8'))) as span:
+                    issues_by_url[url] = parse_flake8('\n'.join(engine.check_source(source, url)))
+                    span['count'] = len(issues_by_url[url])
+                self._emit_linted(url, issues_by_url[url])
             except Exception as e:
-                print(f"Ошибка при загрузке {url}: {e}")
-        return temp_files
+                print(f"Неожиданная ошибка при линтинге {url}: {e}")
+        return issues_by_url
 
     def run_linter(self) -> List[str]:
-        if not self.linter_config or not hasattr(self, 'temp_files') or not self.temp_files:
+        if not self.linter_config:
             return []
 
-        issues = []
-        for url, local_path in self.temp_files.items():
-            try:
-                # Формируем команду для линтера
-                base_cmd = self.linter_config['command'].split()
-                if self.language == 'java':
-                    cmd = base_cmd + [local_path]
-                else:
-                    cmd = [self.linter_config['command'], local_path]
-
-                # Выполняем линтер
-                result = subprocess.run(
-                    cmd,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    text=True,
-                    encoding='utf-8',
-                    check=False  # Не бросаем исключение при ненулевом коде возврата
-                )
-
-                # Обрабатываем вывод
-                output = result.stdout.strip()
-                if not output and result.stderr:
-                    output = result.stderr.strip()
-
-                if output:
-                    if 'output_parser' in self.linter_config:
-                        issues.extend(self.linter_config['output_parser'](output))
-                    else:
-                        issues.extend(output.split('\n'))
-
-            except FileNotFoundError as e:
-                print(f"Линтер не найден: {e}. Проверьте, установлен ли он")
-            except Exception as e:
-                print(f"Неожиданная ошибка при линтинге {url}: {e}")
+        if getattr(self, 'inprocess_lint', False):
+            fresh, unattributed, uncacheable = self._run_inprocess_linter(), [], set()
+        else:
+            fresh, unattributed, uncacheable = self._run_cli_linter()
 
-        return issues
+        # Свежие результаты сохраняем в кэш без путей к файлам; файлы из запусков
+        # с нераспознанными строками не кэшируются, чтобы сбой не запомнился навсегда
+        fingerprint = self._lint_fingerprint()
+        for url, issues in fresh.items():
+            if url not in uncacheable:
+                self.lint_cache.put(self.blob_shas[url], fingerprint, strip_issues(issues))
+
+        # Проблемы хранятся в колоночной таблице, строки для отчёта собираются лениво
+        self.issue_table = IssueTable()
+        for url in self.file_urls:
+            issues = self.cached_issues.get(url, fresh.get(url))
+            if issues is not None:
+                self.issue_table.extend(self._in_changed_lines(url, issues))
+        self.issue_table.extend(unattributed)
+        self.cached_issues = {}
+        return self.issue_table.lines_view()
+
+    @property
+    def issues(self) -> IssueTable:
+        return self.issue_table
+
+    @property
+    def issues_by_url(self) -> Dict[str, List[LintIssue]]:
+        return {url: issues for url, issues in self.issue_table.by_file().items() if url}
+
+    def _in_changed_lines(self, url: str, issues: List[LintIssue]) -> List[LintIssue]:
+        """В инкрементальном режиме оставляет только проблемы в изменённых строках"""
+        path = github_url_to_path(url)
+        if self.changed_lines is None or path not in self.changed_lines:
+            return issues
+        ranges = self.changed_lines[path]
+        return [issue for issue in issues if in_ranges(issue.line, ranges)]
+
+    def _emit_linted(self, url: str, issues: List[LintIssue], cached: bool = False):
+        if self.on_event is not None:
+            emit(self.on_event, 'linted', url=url, issues=len(self._in_changed_lines(url, issues)), cached=cached)
+
+    def _run_cli_linter(self) -> Tuple[Dict[str, List[LintIssue]], List[LintIssue], set]:
+        """
+        Линтит временные файлы внешним линтером. Возвращает проблемы по url
+        (только для успешно проверенных файлов), проблемы без файла и url
+        из запусков, где такие проблемы были (их результаты не кэшируются).
+        Файлы из упавших запусков в результат не попадают.
+        """
+        if not self.temp_files:
+            return {}, [], set()
+
+        # Линтер запускается в машиночитаемом формате (JSON/XML), который
+        # разбирается в записи (файл, строка, столбец, код, сообщение)
+        command, parser = get_output_format(self.language, self.linter_config['command'])
+        # В пакетном режиме линтер запускается один раз на пачку файлов,
+        # а не отдельным процессом (и JVM для checkstyle) на каждый файл;
+        # пачки выполняются параллельно на всех ядрах
+        jobs = [
+            LintJob(command, files, parser)
+            for files in self.lint_scheduler.split(self.temp_files, command, self.batch_lint)
+        ]
+
+        issues_by_url = {}
+        unattributed = []
+        uncacheable = set()
+
+        def on_result(result):
+            if self.on_event is None or result.error is not None:
+                return
+            attributed = {url: [] for url in result.job.files}
+            for url, issue in result.issues:
+                if url in attributed:
+                    attributed[url].append(issue)
+            for url, issues in attributed.items():
+                self._emit_linted(url, issues)
+
+        for result in self.lint_scheduler.run(jobs, on_result):
+            # Линтер работает отдельным процессом, поэтому CPU потока тут не показателен
+            self.recorder.record('lint_job', result.duration, files=len(result.job.files),
+                                 count=len(result.issues), error=type(result.error).__name__ if result.error else None)
+            if isinstance(result.error, FileNotFoundError):
+                print(f"Линтер не найден: {result.error}. Проверьте, установлен ли он")
+            elif isinstance(result.error, subprocess.TimeoutExpired):
+                print(f"Линтер не уложился в {self.lint_scheduler.timeout} с: {', '.join(result.job.files)}")
+            elif isinstance(result.error, LinterError):
+                print(f"Линтер завершился с ошибкой на {', '.join(result.job.files)}: {result.error}")
+                # Отчёт не должен выглядеть как проверка без проблем
+                unattributed.append(LintIssue('', 0, 0, '', f"Ошибка линтера: {result.error}"))
+            elif result.error is not None:
+                print(f"Неожиданная ошибка при линтинге {', '.join(result.job.files)}: {result.error}")
+            if result.error is None:
+                for url in result.job.files:
+                    issues_by_url[url] = []
+            for url, issue in result.issues:
+                if url is None:
+                    unattributed.append(issue)
+                    uncacheable.update(result.job.files)
+                elif url in issues_by_url:
+                    # Путь к временному файлу заменяем ссылкой на исходный файл
+                    issues_by_url[url].append(issue._replace(file=url))
+
+        return issues_by_url, unattributed, uncacheable
 
     def detect_antipatterns(self) -> List[str]:
         if not self.linter_config or 'antipatterns' not in self.linter_config:
             return []
 
-        patterns = self.linter_config['antipatterns']
-        found = []
-
-        for issue in self.linter_issues:
-            for code, description in patterns.items():
-                if code in issue:
-                    found.append(description)
-
-        return list(set(found))
+        # Поиск по словарю кодов вместо перебора всех пар проблема × код
+        return find_antipatterns_by_codes(self.issue_table.count_by_code(), self.linter_config['antipatterns'])
 
     def _get_commit_by_date(self, target_date: dt.datetime) -> str:
         """Возвращает последний коммит до указанной даты в локальном репозитории."""
-        date_str = target_date.strftime("%Y-%m-%d %H:%M:%S")
-        cmd = [
-            "git", "-C", self.repo_path, "log",
-            "--until", date_str,
-            "--format=%H",
-            "-n", "1",
-            "HEAD"
-        ]
         try:
-            result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-            if result.returncode != 0:
-                raise RuntimeError(f"Git error: {result.stderr}")
-            return result.stdout.strip()
+            # Индекс строится одним git log на репозиторий и переиспользуется
+            return get_commit_index(self.repo_path).commit_before(target_date)
         except Exception as e:
             print(f"Error getting commit by date: {e}")
             return ""
@@ -284,58 +558,34 @@ class MergeRequestReport:
             return 0, 0
 
         try:
-            cmd = [
-                'git', '-C', self.repo_path, 'diff',
-                '--numstat',
-                '--diff-filter=AM',
-                f"{self.base_commit}..{self.head_commit}"  # Используем диапазон коммитов
-            ]
-            result = subprocess.run(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                check=True
-            )
-
-            additions = deletions = 0
-            for line in result.stdout.splitlines():
-                parts = line.split('\t')
-                if len(parts) >= 2:
-                    try:
-                        additions += int(parts[0]) if parts[0].isdigit() else 0
-                        deletions += int(parts[1]) if parts[1].isdigit() else 0
-                    except ValueError:
-                        continue
-
+            # Результат кэшируется по паре коммитов (base..head)
+            stats = get_commit_index(self.repo_path).numstat(self.base_commit, self.head_commit)
+            additions = sum(added for added, _, _ in stats)
+            deletions = sum(deleted for _, deleted, _ in stats)
             return additions, deletions
 
-        except subprocess.CalledProcessError as e:
-            print(f"Git diff error: {e.stderr}")
+        except RuntimeError as e:
+            print(f"Git diff error: {e}")
             return 0, 0
         except Exception as e:
             print(f"Error estimating changes: {e}")
             return 0, 0
 
     def _cleanup_temp_files(self):
-        for path in self.temp_files.values():
-            try:
-                os.remove(path)
-            except Exception as e:
-                print(f"Не удалось удалить временный файл {path}: {e}")
+        """Удаляет рабочий каталог отчёта целиком"""
+        if self.workspace is not None:
+            self.workspace.remove()
+        self.temp_files = {}
 
     def size_category(self) -> str:
-        total_changes = self.additions + self.deletions
-        if total_changes <= 50:
-            return 'S'
-        elif total_changes <= 300:
-            return 'M'
-        return 'L'
+        return self.scoring_model.size_category(self.additions + self.deletions)
 
     def quality_score(self) -> int:
-        base = 10
-        penalty = len(self.linter_issues) * 0.5 + len(self.antipatterns)
-        return max(1, int(base - penalty))
+        """Оценка 1..10 по взвешенным проблемам на 100 изменённых строк"""
+        score = self.scoring_model.score(
+            self.issue_table.count_by_code(), self.additions + self.deletions, len(self.antipatterns)
+        )
+        return to_grade(score)
 
     def period(self):
         return f"{self.created_at.date()} — {self.merged_at.date()}"
@@ -347,6 +597,8 @@ class MergeRequestReport:
             "Language": self.language,
             "Size": self.size_category(),
             "Score": self.quality_score(),
+            # IssueLines: строки собираются только при обходе (report.py пишет их поэлементно),
+            # для json.dumps нужен default=list
             "Linter Issues": self.linter_issues,
             "Antipatterns": self.antipatterns,
             "Positives": self.positives,
@@ -355,68 +607,6 @@ class MergeRequestReport:
         }
 
 
-def generate_report(input_data, output_file):
-    """
-    Генерирует отчёт в формате .rpt из входных данных JSON.
-
-    :param input_data: Словарь с входными данными
-    :param output_file: Имя выходного файла (с расширением .rpt)
-    """
-    try:
-        # Формируем содержимое отчёта
-        report_content = f"""Отчёт о качестве кода
-{'=' * 40}
-
-Период анализа: {input_data.get('Period', 'N/A')}
-Язык программирования: {input_data.get('Language', 'N/A').capitalize()}
-Размер проекта: {input_data.get('Size', 'N/A')}
-Общая оценка: {input_data.get('Score', 0)}/10
-
-{'=' * 40}
-Проблемы линтера:
-{format_linter_issues(input_data.get('Linter Issues', []))}
-
-{'=' * 40}
-Антипаттерны:
-{format_list_items(input_data.get('Antipatterns', []))}
-
-{'=' * 40}
-Положительные аспекты:
-{format_list_items(input_data.get('Positives', []))}
-
-{'=' * 40}
-Статистика изменений:
-Добавлено строк: {input_data.get('Additions', 0)}
-Удалено строк: {input_data.get('Deletions', 0)}
-
-{'=' * 40}
-Отчёт сформирован: {dt.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-"""
-
-        # Записываем отчёт в файл
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(report_content)
-
-        print(f"Отчёт успешно сформирован и сохранён в файл: {output_file}")
-
-    except Exception as e:
-        print(f"Ошибка при формировании отчёта: {str(e)}")
-
-
-def format_linter_issues(issues):
-    """Форматирует список проблем линтера для отчёта."""
-    if not issues:
-        return "  Нет проблем"
-    return '\n'.join(f"  • {issue}" for issue in issues)
-
-
-def format_list_items(items):
-    """Форматирует список элементов для отчёта."""
-    if not items:
-        return "  Нет данных"
-    return '\n'.join(f"  • {item}" for item in items)
-
-
 if __name__ == '__main__':
     # ▶️ Пример использования
     example_mr = MergeRequestReport(
@@ -0,0 +1,125 @@
+"""
+Рабочий каталог отчёта для файлов, которые проверяет внешний линтер.
+
+Каждый отчёт получает один каталог, по возможности в оперативной памяти
+(tmpfs: $XDG_RUNTIME_DIR или /dev/shm), иначе во временном каталоге
+системы. Файлы лежат в нём под своими путями в репозитории
+(pkg/module.py, а не tmpab12cd.py), а в корень копируются настройки
+линтеров из текущего каталога, поэтому правила по путям и поиск
+конфигов (rubocop, eslint) работают как в самом репозитории.
+
+Каталог удаляется одним вызовом remove(): сначала атомарно
+переименовывается (после этого его уже не видно под прежним именем),
+затем стирается. remove() вызывается и при ошибке отчёта, а если объект
+просто забыт, каталог удалит сборщик мусора или выход из процесса.
+
+Корень можно задать переменной окружения HACATON_WORKSPACE_DIR.
+"""
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+import weakref
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+
+from gitrepo import github_url_to_path
+
+# tmpfs используется, только если на нём свободно хотя бы столько байт
+MIN_TMPFS_FREE = 256 * 1024 * 1024
+
+
+def _tmpfs_candidates() -> List[str]:
+    candidates = []
+    if os.environ.get('XDG_RUNTIME_DIR'):
+        candidates.append(os.environ['XDG_RUNTIME_DIR'])
+    candidates.append('/dev/shm')
+    return candidates
+
+
+def scratch_root() -> str:
+    """Каталог для рабочих каталогов: HACATON_WORKSPACE_DIR, tmpfs или системный временный"""
+    configured = os.environ.get('HACATON_WORKSPACE_DIR')
+    if configured:
+        os.makedirs(configured, exist_ok=True)
+        return configured
+    for candidate in _tmpfs_candidates():
+        try:
+            if (os.path.isdir(candidate) and os.access(candidate, os.W_OK | os.X_OK)
+                    and shutil.disk_usage(candidate).free >= MIN_TMPFS_FREE):
+                return candidate
+        except OSError:
+            continue
+    return tempfile.gettempdir()
+
+
+def _remove_tree(path: str):
+    """Переименовывает каталог (атомарно) и удаляет его содержимое"""
+    trash = f"{path}.removing-{uuid.uuid4().hex[:8]}"
+    try:
+        os.rename(path, trash)
+    except FileNotFoundError:
+        return
+    except OSError:
+        trash = path
+    shutil.rmtree(trash, ignore_errors=True)
+
+
+class Workspace:
+    def __init__(self, root: Optional[str] = None, prefix: str = 'hacaton-'):
+        self.root = tempfile.mkdtemp(prefix=prefix, dir=root or scratch_root())
+        self.paths: Dict[str, str] = {}
+        self._taken: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._finalizer = weakref.finalize(self, _remove_tree, self.root)
+
+    def _relative_path(self, url: str) -> str:
+        """Путь файла в репозитории по ссылке; '..' и абсолютные пути не выпускают из каталога"""
+        path = github_url_to_path(url) or urlparse(url).path
+        parts = [part if part != '..' else '_' for part in path.replace('\\', '/').split('/') if part not in ('', '.')]
+        return os.path.join(*parts) if parts else 'file'
+
+    def path_for(self, url: str) -> str:
+        """Абсолютный путь для файла по ссылке; родительские каталоги создаются"""
+        with self._lock:
+            if url in self.paths:
+                return self.paths[url]
+            relative = self._relative_path(url)
+            # Один путь из разных репозиториев или коммитов - в отдельный подкаталог
+            candidate, n = relative, 1
+            while candidate in self._taken:
+                candidate = os.path.join(f"_{n}", relative)
+                n += 1
+            self._taken[candidate] = url
+            path = self.paths[url] = os.path.join(self.root, candidate)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return path
+
+    def write(self, url: str, content: bytes) -> str:
+        path = self.path_for(url)
+        with open(path, 'wb') as f:
+            f.write(content)
+        return path
+
+    def copy_configs(self, names: Iterable[str], source_dir: Optional[str] = None):
+        """Копирует в корень найденные в source_dir (по умолчанию - текущем каталоге) настройки линтеров"""
+        source_dir = source_dir or os.getcwd()
+        for name in names:
+            source = os.path.join(source_dir, name)
+            if os.path.isfile(source):
+                shutil.copyfile(source, os.path.join(self.root, name))
+
+    @property
+    def removed(self) -> bool:
+        return not self._finalizer.alive
+
+    def remove(self):
+        """Удаляет каталог со всем содержимым; повторный вызов ничего не делает"""
+        self._finalizer()
+
+    def __enter__(self) -> 'Workspace':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.remove()